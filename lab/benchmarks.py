@@ -0,0 +1,508 @@
+from timeit import timeit
+from types import SimpleNamespace
+
+import numpy as np
+
+from curves.Bezier import (
+    bernstein_cached,
+    bernstein_matrix,
+    bezier_adaptive,
+    bezier_n,
+    de_casteljau,
+)
+from cool_lines.Circle import (
+    Circle,
+    circle_batch,
+    circle_offsets,
+    circle_patterns,
+    ellipse_offsets,
+)
+from cool_lines.Ellipse import Ellipse, ellipse_spans
+from cool_lines.Hyperbola import Hyperbola
+from cool_lines.Parabola import Parabola
+from cool_lines.Conic import ellipse_quadrant, parabola_arm
+from curves.Bounds import CurveIndex
+from curves.Cubic import (
+    BEZIER,
+    HERMITE,
+    evaluate,
+    evaluate_batch,
+    forward_difference,
+)
+from lines.Bresenham import Bresenham, bresenham_batch, bresenham_patterns
+from lines.DDA import DDA
+from raster.Framebuffer import Framebuffer
+from raster.Pixels import Pixels
+from raster.PixelSet import PixelSet
+from raster.Simplify import simplify
+
+
+def random_segments(count, size=800, seed=0):
+    segments = np.random.default_rng(seed).integers(0, size, (count, 4))
+    # The scalar loop never terminates on zero-length segments.
+    segments[:, 2] += segments[:, 0] == segments[:, 2]
+    return segments
+
+
+def bench_bresenham_batch(count=20000):
+    segments = random_segments(count)
+    events = [
+        (SimpleNamespace(x=x_1, y=y_1), SimpleNamespace(x=x_2, y=y_2))
+        for x_1, y_1, x_2, y_2 in segments.tolist()
+    ]
+
+    scalar = timeit(lambda: [Bresenham(*pair) for pair in events], number=1)
+    batch = timeit(lambda: bresenham_batch(segments), number=1)
+    print(
+        "Bresenham, %d segments: scalar %.3fs, batch %.3fs (x%.1f)"
+        % (count, scalar, batch, scalar / batch)
+    )
+
+
+def bench_pattern_cache(number=1000):
+    # The same shapes drawn again at other positions, as repeated clicks do.
+    for name, function, events, cache in (
+        (
+            "Circle radius 300",
+            Circle,
+            (SimpleNamespace(x=0, y=0), SimpleNamespace(x=600, y=600)),
+            circle_patterns,
+        ),
+        (
+            "Bresenham 800x500",
+            Bresenham,
+            (SimpleNamespace(x=0, y=0), SimpleNamespace(x=800, y=500)),
+            bresenham_patterns,
+        ),
+    ):
+
+        def missed():
+            cache.clear()
+            function(*events)
+
+        miss = timeit(missed, number=number) / number
+        cache.clear()
+        hit = timeit(lambda: function(*events), number=number) / number
+        print("%s: miss %.5fs, hit %.5fs, %s" % (name, miss, hit, cache.stats()))
+
+
+def cubic_bezier(points, parameters):
+    t = parameters[:, None]
+    return (
+        (1 - t) ** 3 * points[0]
+        + 3 * (1 - t) ** 2 * t * points[1]
+        + 3 * (1 - t) * t**2 * points[2]
+        + t**3 * points[3]
+    )
+
+
+def polyline_error(curve, polyline):
+    # Largest distance from a dense sampling of the curve to the polyline.
+    start = polyline[:-1][None]
+    direction = (polyline[1:] - polyline[:-1])[None]
+    relative = curve[:, None] - start
+    length = np.maximum((direction**2).sum(axis=2), 1e-12)
+    along = np.clip((relative * direction).sum(axis=2) / length, 0, 1)
+    distance = np.hypot(*(relative - along[..., None] * direction).transpose(2, 0, 1))
+    return distance.min(axis=1).max()
+
+
+def bench_bezier_adaptive(tolerance=0.5):
+    curves = {
+        "short": [(100, 100), (102, 104), (106, 104), (108, 100)],
+        "wide": [(0, 0), (200, 800), (600, -400), (800, 400)],
+        "cusp": [(100, 500), (700, 0), (100, 0), (700, 500)],
+        "hook": [(0, 300), (760, 300), (800, 300), (800, 260)],
+    }
+    for name, points in curves.items():
+        points = np.array(points, dtype=np.float64)
+        events = [SimpleNamespace(x=x, y=y) for x, y in points[[0, 3, 1, 2]]]
+        dense = cubic_bezier(points, np.linspace(0, 1, 4001))
+
+        adaptive = np.asarray(bezier_adaptive(*events, tolerance=tolerance), float)
+        error = polyline_error(dense, adaptive)
+
+        # Smallest uniform sampling that is at least as accurate.
+        low, high = 2, 1000
+        while low < high:
+            middle = (low + high) // 2
+            uniform = cubic_bezier(points, np.linspace(0, 1, middle))
+            if polyline_error(dense, uniform) <= error:
+                high = middle
+            else:
+                low = middle + 1
+        print(
+            "Bezier %s, max error %.3fpx: adaptive %d points, uniform %d, fixed 1000"
+            % (name, error, len(adaptive), low)
+        )
+
+
+def bench_forward_difference(count=2000, samples=1000):
+    controls = np.random.default_rng(0).uniform(-1000, 1000, (count, 4, 2))
+    parameters = np.arange(samples) * 0.001
+
+    for name, basis in (("Bezier", BEZIER), ("Hermite", HERMITE)):
+        direct = timeit(
+            lambda: [evaluate(basis, curve, parameters) for curve in controls],
+            number=1,
+        )
+        incremental = timeit(
+            lambda: [
+                forward_difference(basis, curve, samples, 0.001) for curve in controls
+            ],
+            number=1,
+        )
+        error = max(
+            np.abs(
+                forward_difference(basis, curve, samples, 0.001)
+                - evaluate(basis, curve, parameters)
+            ).max()
+            for curve in controls
+        )
+        print(
+            "%s, %d curves: direct %.3fs, forward differencing %.3fs, max error %.1e px"
+            % (name, count, direct, incremental, error)
+        )
+
+
+def bench_evaluate_batch(count=5000, samples=1000):
+    controls = np.random.default_rng(0).uniform(0, 800, (count, 4, 2))
+    parameters = np.linspace(0, 1, samples)
+
+    for name, basis in (("bezier", BEZIER), ("hermite", HERMITE)):
+        single = timeit(
+            lambda: [evaluate(basis, curve, parameters) for curve in controls],
+            number=1,
+        )
+        batch = timeit(lambda: evaluate_batch(name, controls, samples), number=1)
+        print(
+            "%s, %d curves: one by one %.3fs, batched %.3fs"
+            % (name, count, single, batch)
+        )
+
+
+def bench_bezier_n(degrees=(3, 10, 30), sample_counts=(1000, 100000)):
+    rng = np.random.default_rng(0)
+    for degree in degrees:
+        controls = rng.uniform(0, 800, (degree + 1, 2))
+        events = [SimpleNamespace(x=x, y=y) for x, y in controls.tolist()]
+        for samples in sample_counts:
+            bernstein_cached.cache_clear()
+            cold = timeit(lambda: bezier_n(events, samples), number=1)
+            warm = timeit(lambda: bezier_n(events, samples), number=1)
+            parameters = np.linspace(0, 1, samples)
+            casteljau = timeit(lambda: de_casteljau(controls, parameters), number=1)
+            error = np.abs(
+                bernstein_matrix(degree, samples) @ controls
+                - de_casteljau(controls, parameters)
+            ).max()
+            print(
+                "Bezier degree %d, %d samples: Bernstein %.4fs (again %.4fs), "
+                "de Casteljau %.4fs, max difference %.1e px"
+                % (degree, samples, cold, warm, casteljau, error)
+            )
+
+
+def bench_simplify(count=1000000, tolerance=0.5):
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 20 * np.pi, count)
+    spiral = np.stack((400 + 5 * t * np.cos(t), 300 + 5 * t * np.sin(t)), axis=1)
+    walk = np.cumsum(rng.normal(size=(count, 2)), axis=0)
+    for name, points in (("spiral", spiral), ("random walk", walk)):
+        elapsed = timeit(lambda: simplify(points, tolerance), number=1)
+        kept = len(simplify(points, tolerance))
+        print(
+            "Simplify %s, %d points: %.3fs, %d vertices kept"
+            % (name, count, elapsed, kept)
+        )
+
+
+def bench_curve_index(counts=(1000, 10000), queries=1000):
+    rng = np.random.default_rng(0)
+    for count in counts:
+        index = CurveIndex()
+        for key, controls in enumerate(rng.uniform(0, 40, (count, 4, 2))):
+            index.insert(key, "bezier", controls + rng.uniform(-200, 4000, 2))
+        build = timeit(lambda: index.visible((0, 0, 800, 600)), number=1)
+        clicks = rng.uniform(0, 4000, (queries, 2)).tolist()
+        hits = timeit(lambda: [index.hit(x, y) for x, y in clicks], number=1)
+        culls = timeit(lambda: index.visible((0, 0, 800, 600)), number=1)
+        print(
+            "Curve index, %d curves: build and cull %.4fs, hit test %.1f us, "
+            "cull %.4fs" % (count, build, hits / queries * 1e6, culls)
+        )
+
+
+def float_ellipse_quadrant(radius_x, radius_y):
+    # The float midpoint loop Circle, Ellipse and Hyperbola used before the
+    # integer conic engine, kept as the baseline.
+    xs = []
+    ys = []
+    x = 0
+    y = radius_y
+    decision = radius_y * radius_y - radius_x * radius_x * radius_y
+    decision += 0.25 * radius_x * radius_x
+    dx = 0
+    dy = 2 * radius_x * radius_x * y
+    while dx < dy:
+        xs.append(x)
+        ys.append(y)
+        x += 1
+        dx += 2 * radius_y * radius_y
+        if decision < 0:
+            decision += dx + radius_y * radius_y
+        else:
+            y -= 1
+            dy -= 2 * radius_x * radius_x
+            decision += dx - dy + radius_y * radius_y
+    decision = radius_y * radius_y * (x + 0.5) * (x + 0.5)
+    decision += radius_x * radius_x * ((y - 1) * (y - 1) - radius_y * radius_y)
+    while y >= 0:
+        xs.append(x)
+        ys.append(y)
+        y -= 1
+        dy -= 2 * radius_x * radius_x
+        if decision > 0:
+            decision += radius_x * radius_x - dy
+        else:
+            x += 1
+            dx += 2 * radius_y * radius_y
+            decision += dx - dy + radius_x * radius_x
+    return xs, ys
+
+
+def float_parabola_arm(width, height):
+    # The per-column float evaluation Parabola used before.
+    a = height / (width * width)
+    return list(range(width + 1)), [round(a * x * x) for x in range(width + 1)]
+
+
+def bench_conics(sizes=(100, 1000, 10000), number=20):
+    for size in sizes:
+        radius_y = size * 2 // 3
+        for name, baseline, engine, arguments in (
+            ("Ellipse", float_ellipse_quadrant, ellipse_quadrant, (size, radius_y)),
+            ("Parabola", float_parabola_arm, parabola_arm, (size, radius_y)),
+        ):
+            old = timeit(lambda: baseline(*arguments), number=number) / number
+            new = timeit(lambda: engine(*arguments), number=number) / number
+            print(
+                "%s %dx%d: float %.5fs (%d px), integer %.5fs (%d px)"
+                % (
+                    name,
+                    size,
+                    radius_y,
+                    old,
+                    len(baseline(*arguments)[0]),
+                    new,
+                    len(engine(*arguments)[0]),
+                )
+            )
+
+
+def bench_circle_octant(radii=(100, 1000, 10000), number=20):
+    for radius in radii:
+        quadrant = timeit(lambda: ellipse_offsets(radius, radius), number=number)
+        octant = timeit(lambda: circle_offsets(radius), number=number)
+        print(
+            "Circle radius %d: quadrant %.5fs, octant %.5fs, %d px"
+            % (radius, quadrant / number, octant / number, len(circle_offsets(radius)))
+        )
+
+
+def bench_fill(radius_x=1000, radius_y=700):
+    corners = (
+        SimpleNamespace(x=0, y=0),
+        SimpleNamespace(x=2 * radius_x, y=2 * radius_y),
+    )
+    buffer = np.zeros((2 * radius_y + 1, 2 * radius_x + 1, 3), dtype=np.uint8)
+
+    def spans():
+        ellipse_spans(*corners).fill(buffer, (255, 0, 0))
+
+    def inside_tests():
+        ys, xs = np.indices(buffer.shape[:2])
+        inside = ((xs - radius_x) / radius_x) ** 2 + ((ys - radius_y) / radius_y) ** 2
+        buffer[inside <= 1] = (0, 0, 255)
+
+    print(
+        "Filled ellipse %dx%d: %d spans %.4fs, %d point tests %.4fs"
+        % (
+            radius_x,
+            radius_y,
+            len(ellipse_spans(*corners)),
+            timeit(spans, number=1),
+            buffer.shape[0] * buffer.shape[1],
+            timeit(inside_tests, number=1),
+        )
+    )
+
+
+def bench_conic_viewport(sizes=(1000, 10000, 100000), viewport=(0, 0, 800, 600)):
+    # Curves through the middle of the canvas whose arms run far off-screen.
+    for size in sizes:
+        # The hyperbola's first branch passes the centre at 45 degrees.
+        near = int(0.293 * size)
+        far = size * 2 - near
+        for name, function, events in (
+            (
+                "Parabola",
+                Parabola,
+                (SimpleNamespace(x=400, y=100), SimpleNamespace(x=400 + size, y=size)),
+            ),
+            (
+                "Hyperbola",
+                Hyperbola,
+                (
+                    SimpleNamespace(x=400 - far, y=300 - near),
+                    SimpleNamespace(x=400 + near, y=300 + far),
+                ),
+            ),
+        ):
+            traced = timeit(lambda: function(*events), number=1)
+            clipped = timeit(lambda: function(*events, viewport=viewport), number=1)
+            print(
+                "%s size %d: whole %.4fs (%d px), viewport %.4fs (%d px)"
+                % (
+                    name,
+                    size,
+                    traced,
+                    len(function(*events)),
+                    clipped,
+                    len(function(*events, viewport=viewport)),
+                )
+            )
+
+
+def bench_viewport(sizes=(1000, 10000, 100000), viewport=(0, 0, 800, 600)):
+    # A segment and an ellipse through the middle of the canvas that reach
+    # far off-screen. Spans are counted in rows.
+    for size in sizes:
+        for name, function, events in (
+            (
+                "DDA",
+                DDA,
+                (
+                    SimpleNamespace(x=400 - size, y=300 - size // 2),
+                    SimpleNamespace(x=400 + size, y=300 + size // 2),
+                ),
+            ),
+            (
+                "Ellipse",
+                Ellipse,
+                (
+                    SimpleNamespace(x=400 - size, y=300),
+                    SimpleNamespace(x=400 + size, y=300 + 2 * size),
+                ),
+            ),
+            (
+                "Ellipse spans",
+                ellipse_spans,
+                (
+                    SimpleNamespace(x=400 - size, y=300),
+                    SimpleNamespace(x=400 + size, y=300 + 2 * size),
+                ),
+            ),
+        ):
+            traced = timeit(lambda: function(*events), number=1)
+            clipped = timeit(lambda: function(*events, viewport=viewport), number=1)
+            print(
+                "%s size %d: whole %.4fs (%d), viewport %.4fs (%d)"
+                % (
+                    name,
+                    size,
+                    traced,
+                    len(function(*events)),
+                    clipped,
+                    len(function(*events, viewport=viewport)),
+                )
+            )
+
+
+def bench_pixel_set(count=1000000, size=(800, 600)):
+    rng = np.random.default_rng(0)
+    first, second = (
+        Pixels(rng.integers(0, size[0], count), rng.integers(0, size[1], count))
+        for _ in range(2)
+    )
+    build = timeit(lambda: PixelSet.from_pixels(first), number=1)
+    left = PixelSet.from_pixels(first)
+    right = PixelSet.from_pixels(second)
+    union = timeit(lambda: left.union(right), number=1)
+    difference = timeit(lambda: left.difference(right), number=1)
+    print(
+        "Pixel set of %d pixels: build %.4fs (%d unique in %d runs), "
+        "union %.4fs, difference %.4fs"
+        % (count, build, len(left), len(left.starts), union, difference)
+    )
+
+
+def bench_circle_batch(count=100000, radii=(2, 20)):
+    rng = np.random.default_rng(0)
+    centers = rng.integers(0, 800, (count, 2))
+    sizes = rng.integers(*radii, count)
+    circle_patterns.clear()
+    batch = timeit(lambda: circle_batch(centers, sizes), number=1)
+
+    def one_by_one():
+        for (x, y), radius in zip(centers.tolist(), sizes.tolist()):
+            Circle(
+                SimpleNamespace(x=x - radius, y=y - radius),
+                SimpleNamespace(x=x + radius, y=y + radius),
+            )
+
+    print(
+        "%d circles, radii %d-%d: batch %.4fs (%d px), one by one %.4fs"
+        % (
+            count,
+            radii[0],
+            radii[1] - 1,
+            batch,
+            circle_batch(centers, sizes)[2][-1],
+            timeit(one_by_one, number=1),
+        )
+    )
+
+
+def bench_framebuffer(count=1000, radii=(2, 60)):
+    # Writing a batch of circles into the framebuffer and encoding the dirty
+    # region, against building one tuple per pixel as the item backend does
+    # before it even reaches Tk.
+    rng = np.random.default_rng(0)
+    centers = rng.integers(0, 800, (count, 2))
+    sizes = rng.integers(*radii, count)
+    xs, ys, _ = circle_batch(centers, sizes)
+    pixels = Pixels(xs, ys)
+    framebuffer = Framebuffer(800, 600)
+
+    def draw():
+        framebuffer.draw_pixels(pixels, (0, 0, 0))
+        framebuffer.flush()
+
+    print(
+        "%d circle pixels: framebuffer %.4fs, per-pixel coordinates %.4fs"
+        % (
+            len(pixels),
+            timeit(draw, number=10) / 10,
+            timeit(lambda: list(pixels.tolist()), number=10) / 10,
+        )
+    )
+
+
+if __name__ == "__main__":
+    bench_bresenham_batch()
+    bench_pattern_cache()
+    bench_bezier_adaptive()
+    bench_forward_difference()
+    bench_evaluate_batch()
+    bench_bezier_n()
+    bench_simplify()
+    bench_curve_index()
+    bench_conics()
+    bench_circle_octant()
+    bench_fill()
+    bench_conic_viewport()
+    bench_viewport()
+    bench_pixel_set()
+    bench_circle_batch()
+    bench_framebuffer()
@@ -1,6 +1,30 @@
-def Circle(event_1, event_2, is_circle=True):
-    pixels = []
+import numpy as np
 
+from raster.Clip import box_inside, box_outside, crop
+from raster.PatternCache import PATTERN_LIMIT, PatternCache
+from raster.Pixels import Pixels
+from raster.Runs import Runs
+
+from .Conic import (
+    arc_box,
+    circle_octant,
+    circle_octant_chunks,
+    ellipse_quadrant,
+    ellipse_quadrant_chunks,
+)
+
+# Offsets from the centre, keyed on (radius_x, radius_y, is_circle).
+circle_patterns = PatternCache()
+
+
+def Circle(event_1, event_2, is_circle=True, viewport=None):
+    return Pixels.concatenate(
+        circle_chunks(event_1, event_2, is_circle, viewport=viewport)
+    )
+
+
+def circle_frame(event_1, event_2, is_circle=True):
+    # Centre and radii of the shape inscribed in the drag box.
     radius_x = abs(event_1.x - event_2.x) // 2
     radius_y = abs(event_1.y - event_2.y) // 2
     center_x = min(event_1.x, event_2.x) + radius_x
@@ -8,56 +32,183 @@ def Circle(event_1, event_2, is_circle=True):
 
     if is_circle:
         radius_y = radius_x
+    return center_x, center_y, radius_x, radius_y
 
-    x = 0
-    y = radius_y
 
-    decision_param_1 = (
-        (radius_y * radius_y)
-        - (radius_x * radius_x * radius_y)
-        + (0.25 * radius_x * radius_x)
+def circle_chunks(event_1, event_2, is_circle=True, chunk_size=4096, viewport=None):
+    center_x, center_y, radius_x, radius_y = circle_frame(event_1, event_2, is_circle)
+
+    box = (
+        center_x - radius_x,
+        center_y - radius_y,
+        center_x + radius_x,
+        center_y + radius_y,
     )
-    dx = 2 * radius_y * radius_y * x
-    dy = 2 * radius_x * radius_x * y
-
-    while dx < dy:
-        pixels.append((x + center_x, y + center_y))
-        pixels.append((-x + center_x, y + center_y))
-        pixels.append((x + center_x, -y + center_y))
-        pixels.append((-x + center_x, -y + center_y))
-
-        if decision_param_1 < 0:
-            x += 1
-            dx = dx + (2 * radius_y * radius_y)
-            decision_param_1 = decision_param_1 + dx + (radius_y * radius_y)
-        else:
-            x += 1
-            y -= 1
-            dx = dx + (2 * radius_y * radius_y)
-            dy = dy - (2 * radius_x * radius_x)
-            decision_param_1 = decision_param_1 + dx - dy + (radius_y * radius_y)
-
-    decision_param_2 = (
-        ((radius_y * radius_y) * ((x + 0.5) * (x + 0.5)))
-        + ((radius_x * radius_x) * ((y - 1) * (y - 1)))
-        - (radius_x * radius_x * radius_y * radius_y)
+    if viewport is not None and box_outside(*box, viewport):
+        return
+    center = np.array([center_x, center_y], dtype=np.int32)
+    key = (radius_x, radius_y, is_circle)
+    if pattern_bounded(radius_x, radius_y):
+        pattern = circle_pattern(*key)
+    else:
+        # Only circle_cached stores patterns this large.
+        pattern = circle_patterns.peek(key)
+    if pattern is not None:
+        for first in range(0, len(pattern), chunk_size):
+            chunk = Pixels.from_coords(pattern[first : first + chunk_size] + center)
+            yield chunk if viewport is None else crop(chunk, viewport)
+        return
+
+    if viewport is not None and not box_inside(*box, viewport):
+        # Each quadrant is traced only over its stretch inside the
+        # viewport. Pixels on an axis belong to the quadrants on its
+        # positive side.
+        for sign_x, sign_y in ((1, 1), (-1, 1), (1, -1), (-1, -1)):
+            box = arc_box(viewport, center_x, center_y, sign_x, sign_y)
+            for xs, ys in ellipse_quadrant_chunks(radius_x, radius_y, box, chunk_size):
+                xs = np.array(xs, dtype=np.int32)
+                ys = np.array(ys, dtype=np.int32)
+                keep = ((xs != 0) | (sign_x > 0)) & ((ys != 0) | (sign_y > 0))
+                quadrant = Pixels(
+                    sign_x * xs[keep] + center_x, sign_y * ys[keep] + center_y
+                )
+                yield crop(quadrant, viewport)
+        return
+
+    # Otherwise every traced chunk is mirrored on its own, so only a chunk of
+    # the shape is held at a time.
+    if is_circle:
+        arcs = circle_octant_chunks(radius_x, max(chunk_size // 8, 1))
+        images = octant_images
+    else:
+        arcs = ellipse_quadrant_chunks(
+            radius_x, radius_y, chunk_size=max(chunk_size // 4, 1)
+        )
+        images = quadrant_images
+    for xs, ys in arcs:
+        yield Pixels.from_coords(images(xs, ys) + center)
+
+
+def ellipse_offsets(radius_x, radius_y):
+    return quadrant_images(*ellipse_quadrant(radius_x, radius_y))
+
+
+def circle_offsets(radius):
+    return octant_images(*circle_octant(radius))
+
+
+def quadrant_images(xs, ys):
+    # The quadrant mirrored into all four. Pixels on an axis are their own
+    # mirror image across it, so those repeats are dropped.
+    xs = np.array(xs, dtype=np.int32)
+    ys = np.array(ys, dtype=np.int32)
+    images = np.stack(
+        (
+            np.stack((xs, -xs, xs, -xs), axis=1),
+            np.stack((ys, ys, -ys, -ys), axis=1),
+        ),
+        axis=2,
     )
+    keep = np.ones(images.shape[:2], dtype=bool)
+    keep[xs == 0, 1::2] = False
+    keep[ys == 0, 2:] = False
+    return images[keep]
+
+
+def octant_images(xs, ys):
+    # The octant mirrored into all eight, which takes half the loop steps of a
+    # quadrant. Pixels on an axis or a diagonal have only four distinct
+    # images, so the repeats are dropped.
+    xs = np.array(xs, dtype=np.int32)
+    ys = np.array(ys, dtype=np.int32)
+    images = np.stack(
+        (
+            np.stack((xs, xs, ys, -ys, -xs, -xs, ys, -ys), axis=1),
+            np.stack((ys, -ys, xs, xs, ys, -ys, -xs, -xs), axis=1),
+        ),
+        axis=2,
+    )
+    keep = np.ones(images.shape[:2], dtype=bool)
+    keep[xs == 0, 4:] = False
+    keep[xs == ys, 2:4] = False
+    keep[xs == ys, 6:] = False
+    keep[ys == 0, 1] = False
+    return images[keep]
+
+
+def pattern_bounded(radius_x, radius_y):
+    # A quadrant has at most radius_x + radius_y + 1 pixels.
+    return 4 * (radius_x + radius_y + 1) <= PATTERN_LIMIT
+
+
+def circle_pattern(radius_x, radius_y, is_circle=True, cache=None):
+    # Cached when the shape is small enough, or when `cache` says so.
+    def build():
+        if is_circle:
+            return circle_offsets(radius_x)
+        return ellipse_offsets(radius_x, radius_y)
+
+    if cache is None:
+        cache = pattern_bounded(radius_x, radius_y)
+    if not cache:
+        return build()
+    return circle_patterns.get((radius_x, radius_y, is_circle), build)
+
+
+def circle_cached(event_1, event_2, is_circle=True):
+    center_x, center_y, radius_x, radius_y = circle_frame(event_1, event_2, is_circle)
+    pattern = circle_pattern(radius_x, radius_y, is_circle, cache=True)
+    return Pixels.from_coords(pattern + np.array([center_x, center_y], dtype=np.int32))
+
+
+def circle_batch(centers, radii):
+    # Many circles as one packed (xs, ys, offsets) result, circle i being
+    # xs[offsets[i] : offsets[i + 1]]. Each distinct radius is rasterized once
+    # and its offsets are added to all of its centres in one broadcast.
+    centers = np.asarray(centers, dtype=np.int32).reshape(-1, 2)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.int64), len(centers))
+    distinct, group = np.unique(radii, return_inverse=True)
+    patterns = [circle_pattern(radius, radius) for radius in distinct.tolist()]
+    sizes = np.array([len(pattern) for pattern in patterns], dtype=np.int64)
+
+    offsets = np.zeros(len(centers) + 1, dtype=np.int64)
+    np.cumsum(sizes[group], out=offsets[1:])
+    xs = np.empty(offsets[-1], dtype=np.int32)
+    ys = np.empty(offsets[-1], dtype=np.int32)
+
+    order = np.argsort(group, kind="stable")
+    bounds = np.searchsorted(group[order], np.arange(len(distinct) + 1))
+    for pattern, first, last in zip(patterns, bounds[:-1], bounds[1:]):
+        members = order[first:last]
+        positions = offsets[members, None] + np.arange(len(pattern))
+        xs[positions] = centers[members, 0, None] + pattern[:, 0]
+        ys[positions] = centers[members, 1, None] + pattern[:, 1]
+    return xs, ys, offsets
+
+
+def circle_spans(event_1, event_2, is_circle=True, viewport=None):
+    # The filled shape as one horizontal run per row, reaching from the
+    # leftmost to the rightmost outline pixel of that row.
+    center_x, center_y, radius_x, radius_y = circle_frame(event_1, event_2, is_circle)
+    if viewport is None:
+        pattern = circle_pattern(radius_x, radius_y, is_circle)
+    else:
+        # Only the rows inside the viewport are traced, each one across the
+        # whole shape so that it keeps its outermost pixel. The left half
+        # mirrors the right one.
+        rows = (center_x - radius_x, viewport[1], center_x + radius_x + 1, viewport[3])
+        halves = []
+        for sign_y in (1, -1):
+            xs, ys = ellipse_quadrant(
+                radius_x, radius_y, arc_box(rows, center_x, center_y, 1, sign_y)
+            )
+            halves.append(np.stack((xs, np.multiply(ys, sign_y)), axis=1))
+        pattern = np.concatenate(halves).astype(np.int32).reshape(-1, 2)
+    rows, row = np.unique(pattern[:, 1], return_inverse=True)
+    reach = np.zeros(len(rows), dtype=np.int32)
+    np.maximum.at(reach, row, pattern[:, 0])
 
-    while y >= 0:
-        pixels.append((x + center_x, y + center_y))
-        pixels.append((-x + center_x, y + center_y))
-        pixels.append((x + center_x, -y + center_y))
-        pixels.append((-x + center_x, -y + center_y))
-
-        if decision_param_2 > 0:
-            y -= 1
-            dy = dy - (2 * radius_x * radius_x)
-            decision_param_2 = decision_param_2 + (radius_x * radius_x) - dy
-        else:
-            y -= 1
-            x += 1
-            dx = dx + (2 * radius_y * radius_y)
-            dy = dy - (2 * radius_x * radius_x)
-            decision_param_2 = decision_param_2 + dx - dy + (radius_x * radius_x)
-
-    return pixels
+    runs = Runs(center_x - reach, center_y + rows, 2 * reach + 1)
+    if viewport is not None:
+        return runs.crop(viewport)
+    return runs
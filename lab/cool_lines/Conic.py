@@ -0,0 +1,256 @@
+import math
+import sys
+
+
+def conic_arc(coefficients, start, end, box=None):
+    for xs, ys in conic_arc_chunks(coefficients, start, end, box, sys.maxsize):
+        return xs, ys
+    return [], []
+
+
+def conic_arc_chunks(coefficients, start, end, box=None, chunk_size=4096):
+    # Integer midpoint tracing of a*x^2 + c*y^2 + d*x + e*y + f = 0 from the
+    # pixel `start` to the pixel `end`, over a stretch where both x and y are
+    # monotone, as (xs, ys) lists of at most chunk_size pixels. While the
+    # curve is closer to horizontal, x steps every time and the sign of f
+    # halfway between the two candidate rows picks y, and the other way round
+    # once it is closer to vertical. Decisions work on 4 * f, so the half-pixel
+    # midpoints stay integral and the loop does no floating point.
+    #
+    # With a `box`, only the stretch of the arc within it is traced.
+    if box is not None:
+        clipped = clip_arc(coefficients, start, end, box)
+        if clipped is None:
+            return
+        start, end = clipped
+
+    a, c, d, e, f = coefficients
+    x, y = start
+    x_end, y_end = end
+    step_x = 1 if x_end >= x else -1
+    step_y = 1 if y_end >= y else -1
+    # Along a monotone stretch the gradient components, taken along the
+    # walking direction, keep opposite signs. The equation is negated where
+    # needed so that the y one is never negative, which fixes the sign every
+    # decision is tested against.
+    if (2 * c * (y + y_end) + 2 * e) * step_y < 0:
+        a, c, d, e, f = -a, -c, -d, -e, -f
+    # Four times the gradient components and 4 * f at the current pixel, all
+    # updated by additions as the pixel moves.
+    gradient_x = 4 * (2 * a * x + d) * step_x
+    gradient_y = 4 * (2 * c * y + e) * step_y
+    value = 4 * ((a * x + d) * x + (c * y + e) * y + f)
+    a_4, a_8, a_12 = 4 * a, 8 * a, 12 * a
+    c_4, c_8, c_12 = 4 * c, 8 * c, 12 * c
+    # The most the sum of the gradient components can fall or rise per step,
+    # which bounds how many steps stay within the current region.
+    fall = max(0, -a_8, -a_8 - c_8)
+    rise = max(0, c_8, c_8 + a_8)
+
+    xs = [x]
+    ys = [y]
+    while x != x_end and y != y_end:
+        if len(xs) == chunk_size:
+            yield xs, ys
+            xs = []
+            ys = []
+        slope = gradient_x + gradient_y
+        if slope > 0:
+            # x steps every time, so only the rows are recorded. The run
+            # stops early if the last row is reached.
+            steps = min(abs(x_end - x), chunk_size - len(xs))
+            if fall:
+                steps = min(steps, -(-slope // fall))
+            midpoint = value + gradient_x + a_4 + gradient_y // 2 + c
+            first = len(ys)
+            append = ys.append
+            for _ in range(steps):
+                if midpoint <= 0:
+                    midpoint += gradient_x + a_12 + gradient_y + c_8
+                    gradient_x += a_8
+                    gradient_y += c_8
+                    y += step_y
+                    append(y)
+                    if y == y_end:
+                        break
+                else:
+                    midpoint += gradient_x + a_12
+                    gradient_x += a_8
+                    append(y)
+            steps = len(ys) - first
+            value = midpoint - gradient_x - a_4 - gradient_y // 2 - c
+            xs.extend(range(x + step_x, x + (steps + 1) * step_x, step_x))
+            x += steps * step_x
+        else:
+            steps = min(abs(y_end - y), chunk_size - len(xs))
+            if rise:
+                steps = min(steps, -slope // rise + 1)
+            midpoint = value + gradient_x // 2 + a + gradient_y + c_4
+            first = len(xs)
+            append = xs.append
+            for _ in range(steps):
+                if midpoint >= 0:
+                    midpoint += gradient_x + a_8 + gradient_y + c_12
+                    gradient_x += a_8
+                    gradient_y += c_8
+                    x += step_x
+                    append(x)
+                    if x == x_end:
+                        break
+                else:
+                    midpoint += gradient_y + c_12
+                    gradient_y += c_8
+                    append(x)
+            steps = len(xs) - first
+            value = midpoint - gradient_x // 2 - a - gradient_y - c_4
+            ys.extend(range(y + step_y, y + (steps + 1) * step_y, step_y))
+            y += steps * step_y
+
+    # Once one coordinate is done the rest is a straight run to `end`.
+    xs.extend(range(x + step_x, x_end + step_x, step_x))
+    ys.extend([y] * (len(xs) - len(ys)))
+    ys.extend(range(y + step_y, y_end + step_y, step_y))
+    xs.extend([x_end] * (len(ys) - len(xs)))
+    if len(xs) <= chunk_size:
+        yield xs, ys
+        return
+    for first in range(0, len(xs), chunk_size):
+        yield xs[first : first + chunk_size], ys[first : first + chunk_size]
+
+
+def conic_root(p, q, r, low, high):
+    # The root of p*t^2 + q*t + r = 0 closest to [low, high], clamped into it.
+    if p == 0:
+        roots = [-r / q] if q else [low]
+    else:
+        discriminant = math.sqrt(max(q * q - 4 * p * r, 0))
+        roots = [(-q - discriminant) / (2 * p), (-q + discriminant) / (2 * p)]
+    clamped = [min(max(root, low), high) for root in roots]
+    return min(clamped, key=lambda t: abs(t - roots[clamped.index(t)]))
+
+
+def clip_arc(coefficients, start, end, box):
+    # The (start, end) pixels of the stretch of a conic_arc within the
+    # inclusive box (x_min, y_min, x_max, y_max), or None if it misses it.
+    # Both coordinates are monotone along the arc, so it leaves the box for
+    # good once either one passes the far edge, and enters where the later
+    # one reaches the near edge; that point is solved for on the curve. Its
+    # rounding can put the start a pixel off the traced one, which the walk
+    # makes up within a step, so the box needs a couple of pixels of margin.
+    a, c, d, e, f = coefficients
+    (x_0, y_0), (x_1, y_1) = start, end
+    x_min, y_min, x_max, y_max = box
+    step_x = 1 if x_1 >= x_0 else -1
+    step_y = 1 if y_1 >= y_0 else -1
+
+    # Along the walk, step * coordinate increases for both coordinates.
+    enter_x = max(step_x * x_0, min(step_x * x_min, step_x * x_max))
+    exit_x = min(step_x * x_1, max(step_x * x_min, step_x * x_max))
+    enter_y = max(step_y * y_0, min(step_y * y_min, step_y * y_max))
+    exit_y = min(step_y * y_1, max(step_y * y_min, step_y * y_max))
+    if enter_x > exit_x or enter_y > exit_y:
+        return None
+
+    x = step_x * enter_x
+    if x_0 == x_1:
+        y = step_y * enter_y
+    else:
+        y = conic_root(c, e, (a * x + d) * x + f, min(y_0, y_1), max(y_0, y_1))
+    if step_y * y < enter_y:
+        y = step_y * enter_y
+        x = conic_root(a, d, (c * y + e) * y + f, min(x_0, x_1), max(x_0, x_1))
+    if step_x * x > exit_x + 1 or step_y * y > exit_y + 1:
+        return None
+
+    start_x = step_x * min(max(step_x * round(x), enter_x), exit_x)
+    start_y = step_y * min(max(step_y * round(y), step_y * y_0), exit_y)
+    return (start_x, start_y), (step_x * exit_x, step_y * exit_y)
+
+
+def arc_box(viewport, origin_x, origin_y, sign_x=1, sign_y=1, margin=2):
+    # The viewport grown by `margin`, as a clip_arc box in the frame of an arc
+    # whose point (x, y) is drawn at (origin_x + sign_x * x, origin_y + sign_y * y).
+    x_min, y_min, x_max, y_max = viewport
+    xs = sorted(
+        (sign_x * (x_min - margin - origin_x), sign_x * (x_max - 1 + margin - origin_x))
+    )
+    ys = sorted(
+        (sign_y * (y_min - margin - origin_y), sign_y * (y_max - 1 + margin - origin_y))
+    )
+    return xs[0], ys[0], xs[1], ys[1]
+
+
+def ellipse_coefficients(radius_x, radius_y):
+    return (
+        radius_y * radius_y,
+        radius_x * radius_x,
+        0,
+        0,
+        -radius_x * radius_x * radius_y * radius_y,
+    )
+
+
+def ellipse_quadrant(radius_x, radius_y, box=None):
+    # The arc from (0, radius_y) to (radius_x, 0) of an origin-centred ellipse.
+    return conic_arc(
+        ellipse_coefficients(radius_x, radius_y), (0, radius_y), (radius_x, 0), box
+    )
+
+
+def ellipse_quadrant_chunks(radius_x, radius_y, box=None, chunk_size=4096):
+    return conic_arc_chunks(
+        ellipse_coefficients(radius_x, radius_y),
+        (0, radius_y),
+        (radius_x, 0),
+        box,
+        chunk_size,
+    )
+
+
+def parabola_arm(width, height, box=None):
+    # The arm of width * width * y = height * x^2 from its vertex at the origin
+    # to (width, height); a negative width gives the mirrored arm.
+    return conic_arc(
+        (height, 0, 0, -width * width, 0),
+        (0, 0),
+        (width, height),
+        box,
+    )
+
+
+def circle_octant(radius):
+    for xs, ys in circle_octant_chunks(radius, sys.maxsize):
+        return xs, ys
+    return [], []
+
+
+def circle_octant_chunks(radius, chunk_size=4096):
+    # The arc from (0, radius) to the diagonal of an origin-centred circle,
+    # as (xs, ys) lists of at most chunk_size pixels. The decision starts at
+    # 1 - radius instead of 5/4 - radius. Every update is an integer, so the
+    # two stay a quarter apart and test the same sign.
+    x = 0
+    y = radius
+    decision = 1 - radius
+    xs = []
+    ys = []
+    while x <= y:
+        if len(ys) == chunk_size:
+            yield xs, ys
+            xs = []
+            ys = []
+        # y - x falls by at most two per step, so this many steps all stay
+        # within the octant and only the rows need recording.
+        steps = min((y - x) // 2 + 1, chunk_size - len(ys))
+        append = ys.append
+        for _ in range(steps):
+            append(y)
+            if decision < 0:
+                decision += 2 * x + 3
+            else:
+                decision += 2 * (x - y) + 5
+                y -= 1
+            x += 1
+        xs.extend(range(x - steps, x))
+    if ys:
+        yield xs, ys
@@ -1,5 +1,25 @@
-from .Circle import Circle
+from .Circle import Circle, circle_cached, circle_chunks, circle_spans
 
 
-def Ellipse(event_1, event_2):
-    return Circle(event_1=event_1, event_2=event_2, is_circle=False)
+def Ellipse(event_1, event_2, viewport=None):
+    return Circle(event_1=event_1, event_2=event_2, is_circle=False, viewport=viewport)
+
+
+def ellipse_chunks(event_1, event_2, chunk_size=4096, viewport=None):
+    return circle_chunks(
+        event_1=event_1,
+        event_2=event_2,
+        is_circle=False,
+        chunk_size=chunk_size,
+        viewport=viewport,
+    )
+
+
+def ellipse_cached(event_1, event_2):
+    return circle_cached(event_1=event_1, event_2=event_2, is_circle=False)
+
+
+def ellipse_spans(event_1, event_2, viewport=None):
+    return circle_spans(
+        event_1=event_1, event_2=event_2, is_circle=False, viewport=viewport
+    )
@@ -1,68 +1,67 @@
-def Hyperbola(event_1, event_2):
+import numpy as np
+
+from raster.Clip import crop
+from raster.Pixels import Pixels
+
+from .Conic import arc_box, ellipse_quadrant_chunks
+
+
+def Hyperbola(event_1, event_2, viewport=None):
+    return Pixels.concatenate(hyperbola_chunks(event_1, event_2, viewport=viewport))
+
+
+def hyperbola_polylines(event_1, event_2):
+    # Every step emits one pixel per branch, so the branches interleave.
+    pixels = Hyperbola(event_1, event_2)
+    return [pixels[0::2], pixels[1::2]]
+
+
+def hyperbola_chunks(event_1, event_2, chunk_size=4096, viewport=None):
     semimajor_axis = abs(event_2.x - event_1.x) // 2
     semiminor_axis = abs(event_2.y - event_1.y) // 2
     center_x = (event_1.x + event_2.x) // 2
     center_y = (event_1.y + event_2.y) // 2
-    x = 0
-    y = semiminor_axis
-    decision_param = (
-        semiminor_axis * semiminor_axis
-        - semimajor_axis * semimajor_axis * semiminor_axis
-        + semimajor_axis * semimajor_axis / 4
-    )
-
-    pixels = []
 
-    while semimajor_axis * semimajor_axis * (
-        2 * y - 1
-    ) > 2 * semiminor_axis * semiminor_axis * (x + 1):
-        if decision_param < 0:
-            decision_param = decision_param + semiminor_axis * semiminor_axis * (
-                2 * x + 3
-            )
-            x = x + 1
-        else:
-            decision_param = (
-                decision_param
-                + semiminor_axis * semiminor_axis * (2 * x + 3)
-                + semimajor_axis * semimajor_axis * (-2 * y + 2)
-            )
-            x = x + 1
-            y = y - 1
-        pixels.append((x + center_x, -y + center_y))
-        pixels.append(
+    if viewport is not None:
+        # Each branch is traced only over its stretch inside the viewport.
+        for origin_x, origin_y, sign in (
+            (center_x, center_y, 1),
             (
-                -x + abs(event_1.x - event_2.x) + center_x,
-                y - abs(event_1.y - event_2.y) + center_y,
-            )
-        )
+                abs(event_1.x - event_2.x) + center_x,
+                center_y - abs(event_1.y - event_2.y),
+                -1,
+            ),
+        ):
+            box = arc_box(viewport, origin_x, origin_y, sign, -sign)
+            for xs, ys in ellipse_quadrant_chunks(
+                semimajor_axis, semiminor_axis, box, chunk_size
+            ):
+                xs = np.array(xs, dtype=np.int32)
+                ys = np.array(ys, dtype=np.int32)
+                branch = Pixels(sign * xs + origin_x, -sign * ys + origin_y)
+                yield crop(branch, viewport)
+        return
 
-    decision_param = (
-        semiminor_axis * semiminor_axis * (x + 1) * (x + 1)
-        + semimajor_axis * semimajor_axis * (y - 1) * (y - 1)
-        - semimajor_axis * semimajor_axis * semiminor_axis * semiminor_axis
-    )
-
-    while y > 0:
-        if decision_param < 0:
-            decision_param = (
-                decision_param
-                + semiminor_axis * semiminor_axis * (2 * x + 2)
-                + semimajor_axis * semimajor_axis * (-2 * y + 3)
-            )
-            x = x + 1
-            y = y - 1
-        else:
-            decision_param = decision_param + semimajor_axis * semimajor_axis * (
-                -2 * y + 3
-            )
-            y = y - 1
-        pixels.append((x + center_x, -y + center_y))
-        pixels.append(
-            (
-                -x + abs(event_1.x - event_2.x) + center_x,
-                y - abs(event_1.y - event_2.y) + center_y,
-            )
+    # Each branch is a quarter of the axes' ellipse, the second one turned
+    # half a circle about the far corner of the drag box. Every traced chunk
+    # gives both branches, interleaved.
+    for xs, ys in ellipse_quadrant_chunks(
+        semimajor_axis, semiminor_axis, chunk_size=max(chunk_size // 2, 1)
+    ):
+        xs = np.array(xs, dtype=np.int32)
+        ys = np.array(ys, dtype=np.int32)
+        yield Pixels.from_coords(
+            np.stack(
+                (
+                    np.stack(
+                        (xs + center_x, -xs + abs(event_1.x - event_2.x) + center_x),
+                        axis=1,
+                    ),
+                    np.stack(
+                        (-ys + center_y, ys - abs(event_1.y - event_2.y) + center_y),
+                        axis=1,
+                    ),
+                ),
+                axis=2,
+            ).reshape(-1, 2)
         )
-
-    return pixels
@@ -1,47 +1,39 @@
-def Parabola(event_1, event_2):
-    x1, y1 = event_1.x, event_1.y
-    x2, y2 = event_2.x, event_2.y
+import numpy as np
 
-    a = (y2 - y1) / ((x2 - x1) ** 2)
-    b = -2 * a * x1
-    c = y1 - a * x1**2 - b * x1
+from raster.Clip import crop
+from raster.Pixels import Pixels
 
-    x_start = min(x1, x2)
-    x_end = max(x1, x2)
-    y_values = []
+from .Conic import arc_box, parabola_arm
 
-    x = x_start
-    while x <= x_end:
-        y = a * x**2 + b * x + c
-        y_values.append(y)
-        x += 1
 
-    x_values = list(range(x_start, x_end + 1))
+def Parabola(event_1, event_2, viewport=None):
+    # The vertex is at the first point and both arms reach the height of the
+    # second one. Pixels run from the end of one arm to the end of the other.
+    width = abs(event_2.x - event_1.x)
+    height = event_2.y - event_1.y
+    if viewport is None:
+        xs, ys = parabola_arm(width, height)
+        xs = np.array(xs, dtype=np.int32)
+        ys = np.array(ys, dtype=np.int32)
+        if xs[-1] > 0:
+            xs = np.concatenate((-xs[:0:-1], xs))
+            ys = np.concatenate((ys[:0:-1], ys))
+        return Pixels(xs + event_1.x, ys + event_1.y)
 
-    pixels = []
+    # Each arm is traced only over its stretch inside the viewport. The
+    # vertex column belongs to the right arm.
+    arms = []
+    for sign in (-1, 1) if width else (1,):
+        box = arc_box(viewport, event_1.x, event_1.y, sign)
+        xs, ys = parabola_arm(width, height, box)
+        xs = np.array(xs, dtype=np.int32)
+        ys = np.array(ys, dtype=np.int32)
+        if sign < 0:
+            xs, ys = -xs[::-1], ys[::-1]
+            xs, ys = xs[xs != 0], ys[xs != 0]
+        arms.append(Pixels(xs + event_1.x, ys + event_1.y))
+    return crop(Pixels.concatenate(arms), viewport)
 
-    if x1 < x2:
-        offset = 0
-        for i in range(len(x_values)):
-            pixels.append((x_values[i], y_values[i]))
-            if i > 0:
-                pixels.append(
-                    (x_values[i] - abs(x_values[0] - x_values[i]) - offset, y_values[i])
-                )
-            offset += 1
-    else:
-        offset = 0
-        for i in range(len(x_values)):
-            pixels.append((x_values[i], y_values[i]))
-            if i > 0:
-                pixels.append(
-                    (
-                        x_values[len(x_values) - i]
-                        + 1
-                        + abs(max(x_values) - min(x_values)),
-                        y_values[i],
-                    )
-                )
-            offset += 1
 
-    return pixels
+def parabola_polylines(event_1, event_2):
+    return [Parabola(event_1, event_2)]
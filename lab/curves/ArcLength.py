@@ -0,0 +1,49 @@
+import numpy as np
+
+from raster.Pixels import Pixels
+
+
+class ArcLengthTable:
+    # Cumulative chord length over dense samples taken at evenly spaced
+    # parameters, inverted by binary search to find where a curve is a given
+    # distance along.
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.lengths = np.zeros(len(self.points), dtype=np.float64)
+        np.cumsum(np.hypot(*np.diff(self.points, axis=0).T), out=self.lengths[1:])
+        self.length = self.lengths[-1] if len(self.lengths) else 0.0
+
+    def _locate(self, distances):
+        distances = np.clip(np.asarray(distances, dtype=np.float64), 0, self.length)
+        if len(self.points) < 2:
+            # A single point, or none, is at parameter 0 whatever the distance.
+            zeros = np.zeros(distances.shape, dtype=np.intp)
+            return zeros, np.zeros_like(distances)
+        index = np.searchsorted(self.lengths, distances, side="right") - 1
+        index = np.clip(index, 0, max(len(self.lengths) - 2, 0))
+        span = self.lengths[index + 1] - self.lengths[index]
+        fraction = np.divide(
+            distances - self.lengths[index],
+            span,
+            out=np.zeros_like(distances),
+            where=span > 0,
+        )
+        return index, fraction
+
+    def parameter_at(self, distances):
+        index, fraction = self._locate(distances)
+        return (index + fraction) / max(len(self.points) - 1, 1)
+
+    def point_at(self, distances):
+        index, fraction = self._locate(distances)
+        if len(self.points) < 2:
+            return np.repeat(self.points, len(index), axis=0)
+        start = self.points[index]
+        return start + fraction[:, None] * (self.points[index + 1] - start)
+
+    def spaced(self, spacing=1.0):
+        if len(self.points) < 2:
+            return Pixels(self.points[:, 0], self.points[:, 1], dtype=np.float32)
+        distances = np.append(np.arange(0, self.length, spacing), self.length)
+        curve = self.point_at(distances)
+        return Pixels(curve[:, 0], curve[:, 1], dtype=np.float32)
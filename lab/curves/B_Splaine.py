@@ -1,26 +1,63 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from curves.Cubic import BEZIER, control_points, evaluate_batch, forward_difference
+from raster.Pixels import Pixels
+
+
 def B_Splaine(point1, point2, point3, point4):
-    spline_points = []
     total_points = 1000
-    for index in range(total_points):
-        param = index / (total_points - 1)
-        param_squared = param * param
-        param_cubed = param_squared * param
-        one_minus_param = 1 - param
-        omp_squared = one_minus_param * one_minus_param
-        omp_cubed = omp_squared * one_minus_param
-
-        x_coord = (
-            omp_cubed * point1.x
-            + 3 * omp_squared * param * point4.x
-            + 3 * one_minus_param * param_squared * point3.x
-            + param_cubed * point2.x
-        )
-        y_coord = (
-            omp_cubed * point1.y
-            + 3 * omp_squared * param * point4.y
-            + 3 * one_minus_param * param_squared * point3.y
-            + param_cubed * point2.y
-        )
-
-        spline_points.append((x_coord, y_coord))
-    return spline_points
+    controls = control_points(point1, point4, point3, point2)
+    curve = forward_difference(BEZIER, controls, total_points, 1 / (total_points - 1))
+    return Pixels(curve[:, 0], curve[:, 1], dtype=np.float32)
+
+
+class UniformBSpline:
+    # Piecewise uniform cubic B-spline: segment i is shaped by control points
+    # i..i + 3. Samples are cached per segment, so moving one control point
+    # re-evaluates at most the four segments it touches.
+    def __init__(self, points=(), samples_per_segment=64):
+        self.samples_per_segment = samples_per_segment
+        self.controls = np.empty((0, 2), dtype=np.float64)
+        self._samples = np.empty((0, samples_per_segment, 2), dtype=np.float64)
+        self._stale = np.empty(0, dtype=bool)
+        for point in points:
+            self.append(point)
+
+    def __len__(self):
+        return len(self.controls)
+
+    def append(self, point):
+        self.controls = np.vstack((self.controls, [(point.x, point.y)]))
+        if len(self.controls) >= 4:
+            self._samples = np.concatenate(
+                (self._samples, np.empty((1, self.samples_per_segment, 2)))
+            )
+            self._stale = np.append(self._stale, True)
+
+    def move(self, index, point):
+        self.controls[index] = (point.x, point.y)
+        self._stale[max(index - 3, 0) : index + 1] = True
+
+    def nearest(self, point, radius):
+        if not len(self.controls):
+            return None
+        distances = np.hypot(*(self.controls - (point.x, point.y)).T)
+        index = int(np.argmin(distances))
+        return index if distances[index] <= radius else None
+
+    def samples(self):
+        if not len(self._samples):
+            return Pixels([], [], dtype=np.float32)
+
+        stale = np.flatnonzero(self._stale)
+        if len(stale):
+            windows = sliding_window_view(self.controls, (4, 2))[:, 0]
+            self._samples[stale] = evaluate_batch(
+                "b_spline", windows[stale], self.samples_per_segment
+            )
+            self._stale[:] = False
+
+        # Neighbouring segments share their joint sample.
+        curve = np.concatenate((self._samples[0], self._samples[1:, 1:].reshape(-1, 2)))
+        return Pixels(curve[:, 0], curve[:, 1], dtype=np.float32)
@@ -1,36 +1,198 @@
+import math
+from functools import lru_cache
+
 import numpy as np
 
+from curves.Cubic import BEZIER, control_points, forward_difference
+from raster.Pixels import Pixels
+
 
 def Bezier(event_start, event_end, control_point1, control_point2):
-    bezier_points = [
+    controls = control_points(event_start, control_point1, control_point2, event_end)
+    curve = forward_difference(BEZIER, controls, 1000, 0.001)
+    return Pixels(curve[:, 0], curve[:, 1], dtype=np.float32)
+
+
+def cubic_range(c_1, c_2, c_3):
+    # Smallest and largest value over [0, 1] of the cubic Bernstein polynomial
+    # with coefficients (0, c_1, c_2, c_3). Its extremes are at the ends or
+    # where the quadratic derivative vanishes.
+    q_0, q_1, q_2 = c_1, c_2 - c_1, c_3 - c_2
+    a = q_0 - 2 * q_1 + q_2
+    b = 2 * (q_1 - q_0)
+    if a == 0:
+        roots = [-q_0 / b] if b else []
+    else:
+        discriminant = b * b - 4 * a * q_0
+        if discriminant < 0:
+            roots = []
+        else:
+            root = math.sqrt(discriminant)
+            roots = [(-b - root) / (2 * a), (-b + root) / (2 * a)]
+    values = [0.0, c_3]
+    for t in roots:
+        if 0 < t < 1:
+            values.append(3 * (1 - t) * t * ((1 - t) * c_1 + t * c_2) + t * t * t * c_3)
+    return min(values), max(values)
+
+
+def lerp(p, q, t):
+    return (p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1]))
+
+
+def split(p0, p1, p2, p3, t):
+    # De Casteljau split of a cubic at t into its two halves.
+    p01 = lerp(p0, p1, t)
+    p12 = lerp(p1, p2, t)
+    p23 = lerp(p2, p3, t)
+    p012 = lerp(p01, p12, t)
+    p123 = lerp(p12, p23, t)
+    cut = lerp(p012, p123, t)
+    return (p0, p01, p012, cut), (cut, p123, p23, p3)
+
+
+def chord_distance(p0, p1, p2, p3):
+    # How far the cubic strays from its chord. In the frame of the chord both
+    # coordinates are cubics in t, so their exact extremes give the sideways
+    # distance and the overshoot past the chord ends.
+    chord_x = p3[0] - p0[0]
+    chord_y = p3[1] - p0[1]
+    chord = math.hypot(chord_x, chord_y)
+    if chord == 0:
+        return max(math.hypot(p[0] - p0[0], p[1] - p0[1]) for p in (p1, p2))
+    along = [
+        (chord_x * (p[0] - p0[0]) + chord_y * (p[1] - p0[1])) / chord for p in (p1, p2)
+    ]
+    across = [
+        (chord_x * (p[1] - p0[1]) - chord_y * (p[0] - p0[0])) / chord for p in (p1, p2)
+    ]
+    low, high = cubic_range(along[0], along[1], chord)
+    overshoot = max(0.0, -low, high - chord)
+    low, high = cubic_range(across[0], across[1], 0.0)
+    return math.hypot(max(-low, high), overshoot)
+
+
+def bezier_adaptive(
+    event_start, event_end, control_point1, control_point2, tolerance=0.5, steps=10
+):
+    # Walks the curve cutting off the longest piece that stays within
+    # `tolerance` pixels of its chord, found by bisecting the cut parameter
+    # `steps` times. Taking the longest piece each time gives close to the
+    # fewest pieces for the tolerance.
+    x_coordinates = [event_start.x]
+    y_coordinates = [event_start.y]
+
+    rest = (
         (event_start.x, event_start.y),
         (control_point1.x, control_point1.y),
         (control_point2.x, control_point2.y),
         (event_end.x, event_end.y),
-    ]
+    )
+    while chord_distance(*rest) > tolerance:
+        low, high = 0.0, 1.0
+        for _ in range(steps):
+            middle = (low + high) / 2
+            if chord_distance(*split(*rest, middle)[0]) <= tolerance:
+                low = middle
+            else:
+                high = middle
+        # A piece too curved for every cut tried keeps halving instead.
+        while low == 0:
+            high /= 2
+            if chord_distance(*split(*rest, high)[0]) <= tolerance:
+                low = high
+        piece, rest = split(*rest, low)
+        x_coordinates.append(piece[3][0])
+        y_coordinates.append(piece[3][1])
+
+    x_coordinates.append(rest[3][0])
+    y_coordinates.append(rest[3][1])
+    return Pixels(x_coordinates, y_coordinates, dtype=np.float32)
+
+
+# Beyond this degree the cached Bernstein table grows large and its binomial
+# and power terms drift toward overflow and underflow (binomials leave the
+# float range near degree 1020), so de Casteljau takes over.
+BERNSTEIN_MAX_DEGREE = 64
+
+
+# Tables of at most this many weights are cached, so the 16 cached tables take
+# at most 8 MB. Larger ones, such as high degrees at 100k samples, are built
+# on every call.
+BERNSTEIN_CACHE_LIMIT = 65536
+
+
+def bernstein_table(degree, samples):
+    # (samples, degree + 1) Bernstein weights at t = linspace(0, 1, samples).
+    parameters = np.linspace(0, 1, samples)[:, None]
+    k = np.arange(degree + 1)
+    binomials = np.array([math.comb(degree, i) for i in k], dtype=np.float64)
+    table = binomials * parameters**k * (1 - parameters) ** (degree - k)
+    table.flags.writeable = False
+    return table
+
+
+bernstein_cached = lru_cache(maxsize=16)(bernstein_table)
+
+
+def bernstein_matrix(degree, samples):
+    if (degree + 1) * samples <= BERNSTEIN_CACHE_LIMIT:
+        return bernstein_cached(degree, samples)
+    return bernstein_table(degree, samples)
+
+
+def de_casteljau(controls, parameters, chunk_size=4096):
+    # Repeated convex combinations, vectorized over parameters and done in
+    # chunks so memory stays at chunk_size * (degree + 1) points.
+    controls = np.asarray(controls, dtype=np.float64)
+    degree = len(controls) - 1
+    curve = np.empty((len(parameters), 2), dtype=np.float64)
+    for start in range(0, len(parameters), chunk_size):
+        t = parameters[start : start + chunk_size, None, None]
+        points = np.broadcast_to(controls, (len(t),) + controls.shape).copy()
+        for level in range(degree, 0, -1):
+            points[:, :level] += t * (points[:, 1 : level + 1] - points[:, :level])
+        curve[start : start + chunk_size] = points[:, 0]
+    return curve
+
+
+def bezier_n(points, samples=1000):
+    controls = control_points(*points)
+    degree = len(controls) - 1
+    if degree <= BERNSTEIN_MAX_DEGREE:
+        curve = bernstein_matrix(degree, samples) @ controls
+    else:
+        curve = de_casteljau(controls, np.linspace(0, 1, samples))
+    return Pixels(curve[:, 0], curve[:, 1], dtype=np.float32)
+
+
+class BezierCurve:
+    # A single Bezier of any degree over its clicked control points.
+    def __init__(self, points=(), samples=1000):
+        self.samples_count = samples
+        self.points = list(points)
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def controls(self):
+        return control_points(*self.points).reshape(-1, 2)
+
+    def append(self, point):
+        self.points.append(point)
+
+    def move(self, index, point):
+        self.points[index] = point
+
+    def nearest(self, point, radius):
+        if not self.points:
+            return None
+        distances = np.hypot(*(self.controls - (point.x, point.y)).T)
+        index = int(np.argmin(distances))
+        return index if distances[index] <= radius else None
 
-    curve_coordinates = []
-
-    for parameter in np.arange(0, 1, 0.001):
-        parameter_squared = parameter * parameter
-        parameter_cubed = parameter_squared * parameter
-        one_minus_parameter = 1 - parameter
-        one_minus_parameter_squared = one_minus_parameter * one_minus_parameter
-        one_minus_parameter_cubed = one_minus_parameter_squared * one_minus_parameter
-
-        x_coordinate = (
-            one_minus_parameter_cubed * bezier_points[0][0]
-            + 3 * one_minus_parameter_squared * parameter * bezier_points[1][0]
-            + 3 * one_minus_parameter * parameter_squared * bezier_points[2][0]
-            + parameter_cubed * bezier_points[3][0]
-        )
-        y_coordinate = (
-            one_minus_parameter_cubed * bezier_points[0][1]
-            + 3 * one_minus_parameter_squared * parameter * bezier_points[1][1]
-            + 3 * one_minus_parameter * parameter_squared * bezier_points[2][1]
-            + parameter_cubed * bezier_points[3][1]
-        )
-
-        curve_coordinates.append([x_coordinate, y_coordinate])
-
-    return curve_coordinates
+    def samples(self):
+        if not self.points:
+            return Pixels([], [], dtype=np.float32)
+        return bezier_n(self.points, self.samples_count)
@@ -0,0 +1,182 @@
+import numpy as np
+
+from curves.Cubic import BASES, BEZIER
+from raster.Clip import box_outside
+
+# A curve's hierarchy ends in 2^LEAF_DEPTH sub-curves, flat enough that their
+# chords stand in for the curve when measuring click distances.
+LEAF_DEPTH = 6
+
+
+def bezier_controls(name, controls):
+    # The Bezier control polygon of the same cubic in any of the BASES.
+    controls = np.asarray(controls, dtype=np.float64)
+    return np.linalg.solve(BEZIER, BASES[name] @ controls)
+
+
+def split_halves(pieces):
+    # De Casteljau at t = 1/2 for a stack of (N, 4, 2) control polygons. The
+    # halves of piece i land at 2i and 2i + 1.
+    p0, p1, p2, p3 = (pieces[:, i] for i in range(4))
+    p01 = (p0 + p1) / 2
+    p12 = (p1 + p2) / 2
+    p23 = (p2 + p3) / 2
+    p012 = (p01 + p12) / 2
+    p123 = (p12 + p23) / 2
+    middle = (p012 + p123) / 2
+    left = np.stack((p0, p01, p012, middle), axis=1)
+    right = np.stack((middle, p123, p23, p3), axis=1)
+    return np.stack((left, right), axis=1).reshape(-1, 4, 2)
+
+
+class CurveBounds:
+    # A cubic Bezier lies inside the convex hull of its control points, so the
+    # box around each level's control polygons bounds that part of the curve.
+    # Queries descend the levels and only split boxes that still qualify.
+    def __init__(self, controls, depth=LEAF_DEPTH):
+        pieces = np.asarray(controls, dtype=np.float64).reshape(1, 4, 2)
+        self.levels = []
+        for level in range(depth + 1):
+            if level:
+                pieces = split_halves(pieces)
+            self.levels.append(
+                np.concatenate((pieces.min(axis=1), pieces.max(axis=1)), axis=1)
+            )
+        self.chords = pieces[:, [0, 3]]
+        self.box = tuple(self.levels[0][0].tolist())
+
+    def _leaves(self, keep):
+        nodes = np.zeros(1, dtype=np.intp)
+        for level, boxes in enumerate(self.levels):
+            if level:
+                nodes = (2 * nodes[:, None] + (0, 1)).ravel()
+            nodes = nodes[keep(boxes[nodes])]
+            if len(nodes) == 0:
+                break
+        return nodes
+
+    def distance(self, x, y, radius=np.inf):
+        leaves = self._leaves(
+            lambda boxes: (boxes[:, 0] - radius <= x)
+            & (boxes[:, 1] - radius <= y)
+            & (boxes[:, 2] + radius >= x)
+            & (boxes[:, 3] + radius >= y)
+        )
+        if len(leaves) == 0:
+            return np.inf
+        start = self.chords[leaves, 0]
+        chord = self.chords[leaves, 1] - start
+        offset = (x, y) - start
+        length = np.einsum("ij,ij->i", chord, chord)
+        t = np.clip(
+            np.einsum("ij,ij->i", offset, chord) / np.where(length == 0, 1, length),
+            0,
+            1,
+        )
+        gap = offset - t[:, None] * chord
+        return float(np.hypot(gap[:, 0], gap[:, 1]).min())
+
+    def outside(self, viewport):
+        x_min, y_min, x_max, y_max = viewport
+        leaves = self._leaves(
+            lambda boxes: (boxes[:, 2] >= x_min)
+            & (boxes[:, 3] >= y_min)
+            & (boxes[:, 0] < x_max)
+            & (boxes[:, 1] < y_max)
+        )
+        return len(leaves) == 0
+
+
+class CurveIndex:
+    # Bounding volume hierarchy over the root boxes of many curves. Nodes are
+    # split at the median along their wider axis, and the tree is rebuilt on
+    # the first query after curves were added or removed.
+    def __init__(self, leaf_size=8):
+        self.leaf_size = leaf_size
+        self.curves = {}
+        self._nodes = None
+
+    def __len__(self):
+        return len(self.curves)
+
+    def insert(self, key, name, controls):
+        self.curves[key] = CurveBounds(bezier_controls(name, controls))
+        self._nodes = None
+
+    def remove(self, key):
+        del self.curves[key]
+        self._nodes = None
+
+    def clear(self):
+        self.curves.clear()
+        self._nodes = None
+
+    def _build(self):
+        self._keys = list(self.curves)
+        self._boxes = [self.curves[key].box for key in self._keys]
+        boxes = np.array(self._boxes, dtype=np.float64).reshape(-1, 4)
+        centers = boxes[:, :2] + boxes[:, 2:]
+        self._order = np.arange(len(boxes))
+        self._nodes = []
+        if len(boxes) == 0:
+            return
+
+        # Each entry is (box, start, end, children) over a range of _order.
+        stack = [(0, len(boxes), None)]
+        while stack:
+            start, end, parent = stack.pop()
+            members = self._order[start:end]
+            box = (
+                *boxes[members, :2].min(axis=0).tolist(),
+                *boxes[members, 2:].max(axis=0).tolist(),
+            )
+            if parent is not None:
+                parent.append(len(self._nodes))
+            children = []
+            self._nodes.append((box, start, end, children))
+            if end - start > self.leaf_size:
+                spread = np.ptp(centers[members], axis=0)
+                axis = int(np.argmax(spread))
+                middle = (end - start) // 2
+                self._order[start:end] = members[
+                    np.argpartition(centers[members, axis], middle)
+                ]
+                stack.append((start + middle, end, children))
+                stack.append((start, start + middle, children))
+        self._order = self._order.tolist()
+
+    def _candidates(self, rejects):
+        if self._nodes is None:
+            self._build()
+        stack = [0] if self._nodes else []
+        while stack:
+            box, start, end, children = self._nodes[stack.pop()]
+            if rejects(box):
+                continue
+            if children:
+                stack.extend(children)
+                continue
+            for index in self._order[start:end]:
+                if not rejects(self._boxes[index]):
+                    yield self._keys[index]
+
+    def hit(self, x, y, radius=5):
+        # Key of the curve nearest to (x, y) within `radius`, or None.
+        nearest = None
+        for key in self._candidates(
+            lambda box: x < box[0] - radius
+            or y < box[1] - radius
+            or x > box[2] + radius
+            or y > box[3] + radius
+        ):
+            distance = self.curves[key].distance(x, y, radius)
+            if distance <= radius:
+                nearest, radius = key, distance
+        return nearest
+
+    def visible(self, viewport):
+        return [
+            key
+            for key in self._candidates(lambda box: box_outside(*box, viewport))
+            if not self.curves[key].outside(viewport)
+        ]
@@ -0,0 +1,97 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Power-basis matrices: rows give the t^3, t^2, t and 1 coefficients of each
+# control point's weight, so basis @ controls are the polynomial coefficients.
+BEZIER = np.array(
+    [
+        [-1, 3, -3, 1],
+        [3, -6, 3, 0],
+        [-3, 3, 0, 0],
+        [1, 0, 0, 0],
+    ],
+    dtype=np.float64,
+)
+
+# Controls are (start, start tangent, end, end tangent).
+HERMITE = np.array(
+    [
+        [2, 1, -2, 1],
+        [-3, -2, 3, -1],
+        [0, 1, 0, 0],
+        [1, 0, 0, 0],
+    ],
+    dtype=np.float64,
+)
+
+# Uniform cubic B-spline segment over four consecutive control points.
+B_SPLINE = (
+    np.array(
+        [
+            [-1, 3, -3, 1],
+            [3, -6, 3, 0],
+            [-3, 0, 3, 0],
+            [1, 4, 1, 0],
+        ],
+        dtype=np.float64,
+    )
+    / 6
+)
+
+BASES = {"bezier": BEZIER, "hermite": HERMITE, "b_spline": B_SPLINE}
+
+
+def control_points(*events):
+    return np.array([(event.x, event.y) for event in events], dtype=np.float64)
+
+
+def evaluate(basis, controls, parameters):
+    parameters = np.asarray(parameters, dtype=np.float64)[:, None]
+    a, b, c, d = basis @ controls
+    return ((a * parameters + b) * parameters + c) * parameters + d
+
+
+def forward_difference(basis, controls, samples, step):
+    # Samples the cubic at t = 0, step, 2 * step, ... by forward differencing:
+    # after the start value and the three initial differences, each sample
+    # costs three additions per coordinate, done here as three running sums.
+    #
+    # Error bound: with unit roundoff u = 2^-53, sample k differs from direct
+    # evaluation by at most about u * (k * F + k^2 / 2 * D1 + k^3 / 6 * D2),
+    # where F, D1 and D2 bound the magnitudes of the sample and of its first
+    # and second differences. For 1000 samples of a curve on an 800x600
+    # canvas that is below 1e-9 px.
+    a, b, c, d = basis @ controls
+    step_2 = step * step
+    step_3 = step_2 * step
+
+    deltas = np.empty((samples, 2), dtype=np.float64)
+    deltas[:1] = d
+    deltas[1:2] = a * step_3 + b * step_2 + c * step
+    deltas[2:3] = 6 * a * step_3 + 2 * b * step_2
+    deltas[3:] = 6 * a * step_3
+
+    np.cumsum(deltas[2:], axis=0, out=deltas[2:])
+    np.cumsum(deltas[1:], axis=0, out=deltas[1:])
+    np.cumsum(deltas, axis=0, out=deltas)
+    return deltas
+
+
+@lru_cache(maxsize=64)
+def basis_table(name, samples):
+    # (samples, 4) weights of the four controls at t = linspace(0, 1, samples).
+    # Shared between callers, so it is returned read-only.
+    parameters = np.linspace(0, 1, samples)
+    powers = np.stack(
+        (parameters**3, parameters**2, parameters, np.ones_like(parameters)), axis=1
+    )
+    table = powers @ BASES[name]
+    table.flags.writeable = False
+    return table
+
+
+def evaluate_batch(name, controls, samples=1000):
+    # controls is a (curves, 4, 2) tensor, the result is (curves, samples, 2).
+    controls = np.asarray(controls, dtype=np.float64).reshape(-1, 4, 2)
+    return basis_table(name, samples) @ controls
@@ -2,11 +2,24 @@ from tkinter import Tk, Canvas, Button
 from tkinter import ttk
 import tkinter as tk
 
-from copy import deepcopy
-
+from functools import partial
 from importlib import import_module
+from itertools import count
 import logging
 
+from curves.ArcLength import ArcLengthTable
+from curves.B_Splaine import UniformBSpline
+from curves.Bounds import CurveIndex
+from curves.Bezier import BezierCurve
+from curves.Cubic import control_points
+from lines.Wu import COVERAGE_COLORS
+from raster.Framebuffer import Framebuffer
+from raster.Pixels import Pixels
+from raster.PixelSet import PixelSet
+from raster.Rasterize import rasterize_polyline
+from raster.Runs import Runs
+from raster.Simplify import simplify
+
 logging.basicConfig(
     format="[%(asctime)s | %(levelname)s]: %(message)s",
     datefmt="%m.%d.%Y %H:%M:%S",
@@ -37,6 +50,24 @@ class Paint:
         )
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.canvas.bind("<Button-1>", self.click_handler)
+        self.canvas.bind("<B1-Motion>", self._curve_drag)
+        self.canvas.bind("<ButtonRelease-1>", self._curve_release)
+        self.canvas.bind("<Button-3>", self._curve_finish)
+        self.curve = None
+        self.dragged_point = None
+        self.curve_index = CurveIndex()
+        self.curve_keys = count()
+        # Clicks collected for the shape being drawn.
+        self.draw = []
+        # The framebuffer backend draws into one image item instead of adding
+        # an item per pixel. Pixels of erasable curves drawn there are kept to
+        # paint them over when erased.
+        self.framebuffer = Framebuffer(self.canvas_width, self.canvas_height)
+        self.photo = tk.PhotoImage(
+            master=self.window, width=self.canvas_width, height=self.canvas_height
+        )
+        self.raster_curves = {}
+        self._show_framebuffer()
 
     def _setup_tools(self):
         self.colors = ["black", "red", "green",
@@ -46,15 +77,31 @@ class Paint:
             "DDA",
             "Wu",
             "Bresenham",
+            "RunSlice",
             "Ellipse",
             "Circle",
             "Hyperbola",
             "Parabola",
             "B_Splaine",
             "Bezier",
+            "Bezier_N",
             "Hermite",
+            "Erase",
         ]
         self.selected_mode = self.mode[0]
+        # Modes drawn by a rasterizer of their module other than the one named
+        # after them. DDA uses the fixed-point variant, which plots the start
+        # pixel and takes subpixel endpoints. Bezier is sampled adaptively, so
+        # flat stretches take few points and tight bends many.
+        self.mode_functions = {"DDA": "dda_fixed", "Bezier": "bezier_adaptive"}
+        # Modes drawn from any number of draggable control points.
+        self.control_curves = {"B_Splaine": UniformBSpline, "Bezier_N": BezierCurve}
+        # Cubic modes kept in the curve index for erasing: their basis and the
+        # order in which the clicks are used as its controls.
+        self.indexed_curves = {
+            "Bezier": ("bezier", (0, 2, 3, 1)),
+            "Hermite": ("hermite", (0, 2, 1, 3)),
+        }
 
         self.tool_frame = ttk.LabelFrame(self.window, text="Tools")
         self.tool_frame.pack(side=tk.RIGHT, padx=5, pady=5, fill=tk.Y)
@@ -100,9 +147,46 @@ class Paint:
         )
         self.debug_button_cool_line.pack(side=tk.TOP, padx=5, pady=5)
 
+        # Curves and conics can be drawn as one simplified polyline item
+        # instead of one canvas item per pixel.
+        self.simplify_tolerance = 0.5
+        self.simplify_enabled = tk.BooleanVar(self.window, value=False)
+        self.simplify_checkbutton = ttk.Checkbutton(
+            self.tool_frame, text="Simplify", variable=self.simplify_enabled
+        )
+        self.simplify_checkbutton.pack(side=tk.TOP, padx=5, pady=5)
+
+        # Circles and ellipses can be drawn filled, one run per scanline.
+        self.fill_enabled = tk.BooleanVar(self.window, value=False)
+        self.fill_checkbutton = ttk.Checkbutton(
+            self.tool_frame, text="Fill", variable=self.fill_enabled
+        )
+        self.fill_checkbutton.pack(side=tk.TOP, padx=5, pady=5)
+
+        # Pixels can be merged into horizontal runs before drawing, which
+        # drops the ones a rasterizer emits more than once.
+        self.spans_enabled = tk.BooleanVar(self.window, value=False)
+        self.spans_checkbutton = ttk.Checkbutton(
+            self.tool_frame, text="Merge spans", variable=self.spans_enabled
+        )
+        self.spans_checkbutton.pack(side=tk.TOP, padx=5, pady=5)
+
+        self.framebuffer_enabled = tk.BooleanVar(self.window, value=False)
+        self.framebuffer_checkbutton = ttk.Checkbutton(
+            self.tool_frame, text="Framebuffer", variable=self.framebuffer_enabled
+        )
+        self.framebuffer_checkbutton.pack(side=tk.TOP, padx=5, pady=5)
+
     def clear_canvas(self) -> None:
         logging.info("Clear all")
         self.canvas.delete("all")
+        self.curve = None
+        self.dragged_point = None
+        self.draw = []
+        self.curve_index.clear()
+        self.raster_curves.clear()
+        self.framebuffer.clear()
+        self._show_framebuffer()
 
     def _select_color(self, color: str) -> None:
         logging.info("Select " + color + " Color")
@@ -110,20 +194,32 @@ class Paint:
 
     def _select_mode(self, mode: str) -> None:
         logging.info("Select " + mode + " Mode")
+        self._curve_finish()
+        self.draw = []
         self.selected_mode = mode
 
     def click_handler(self, event) -> None:
-        try:
-            self.draw.append(event)
-            if (
-                self.selected_mode in ["B_Splaine", "Bezier", "Hermite"]
-                and len(self.draw) < 4
-            ):
-                return
-        except AttributeError:
-            self.draw = [event]
+        if self.selected_mode in self.control_curves:
+            self._curve_click(event)
+            return
+        if self.selected_mode == "Erase":
+            self._erase_curve(event)
             return
-        if self.selected_mode in ["DDA", "Wu", "Bresenham"]:
+        self.draw.append(event)
+        clicks = 4 if self.selected_mode in ["Bezier", "Hermite"] else 2
+        if len(self.draw) < clicks:
+            return
+        # The clicks are used up even if drawing fails, so the next shape
+        # starts afresh.
+        try:
+            self._draw_shape(self.draw[:clicks])
+        finally:
+            self.draw = []
+
+    def _draw_shape(self, draw) -> None:
+        options = {"viewport": (0, 0, self.canvas_width, self.canvas_height)}
+        sampled = False
+        if self.selected_mode in ["DDA", "Wu", "Bresenham", "RunSlice"]:
             module = import_module("lines." + self.selected_mode)
         elif self.selected_mode in [
             "Ellipse",
@@ -134,74 +230,210 @@ class Paint:
             module = import_module("cool_lines." + self.selected_mode)
         else:
             module = import_module("curves." + self.selected_mode)
-        function = getattr(module, self.selected_mode)
-        try:
-            self.points, self.additional, change_flag = function(
-                self.draw[0], self.draw[1]
+            options = {}
+            sampled = True
+        name = self.mode_functions.get(self.selected_mode, self.selected_mode)
+        function = getattr(module, name)
+        chunks = getattr(module, name.lower() + "_chunks", None)
+        polylines = getattr(module, name.lower() + "_polylines", None)
+        spans = getattr(module, name.lower() + "_spans", None)
+        logging.info("Draw in " + self.selected_mode + " Mode")
+        self.drawn_spans = PixelSet()
+        self.overdraw = 0
+        tags = ()
+        if self.selected_mode in self.indexed_curves:
+            name, order = self.indexed_curves[self.selected_mode]
+            tags = "indexed_curve_%d" % next(self.curve_keys)
+            self.curve_index.insert(
+                tags, name, control_points(*(draw[index] for index in order))
             )
-            self.old_additional = deepcopy(self.additional)
-        except Exception:
-            if len(self.draw) == 2:
-                self.points = function(self.draw[0], self.draw[1])
+        if self.fill_enabled.get() and spans is not None:
+            runs = spans(*draw, **options)
+            self._draw_runs(runs)
+            self.points = runs.to_pixels()
+            self.arc_table = None
+        elif self.simplify_enabled.get() and (sampled or polylines is not None):
+            if sampled:
+                samples = function(*draw, **options)
+                self.arc_table = ArcLengthTable(samples.coords)
+                self._draw_polylines([samples], tags=tags)
+                self.points = rasterize_polyline(samples)
+            else:
+                paths = polylines(*draw)
+                self.arc_table = None
+                self._draw_polylines(paths)
+                self.points = Pixels.concatenate(paths)
+        elif chunks is None:
+            self.points = function(*draw, **options)
+            if sampled:
+                self.arc_table = ArcLengthTable(self.points.coords)
+                self.points = rasterize_polyline(self.points)
+            else:
+                self.arc_table = None
+            if isinstance(self.points, Runs):
+                self._draw_runs(self.points)
+                self.points = self.points.to_pixels()
             else:
-                self.points = function(
-                    self.draw[0], self.draw[1], self.draw[2], self.draw[3]
+                self._draw_pixels(self.points, tags=tags)
+        else:
+            for chunk in chunks(*draw, **options):
+                self._draw_pixels(chunk)
+                self.canvas.update_idletasks()
+            # Chunks are dropped once drawn, so only one is held at a time. The
+            # debug views rasterize the shape again if they are opened.
+            self.points = None
+            self.replay = partial(function, *draw, **options)
+            self.arc_table = None
+        if len(self.drawn_spans):
+            logging.info(
+                "Drew %d pixels as %d spans, %d overdrawn pixels removed"
+                % (len(self.drawn_spans), len(self.drawn_spans.starts), self.overdraw)
+            )
+
+    def _erase_curve(self, event) -> None:
+        key = self.curve_index.hit(event.x, event.y, radius=5)
+        if key is not None:
+            logging.info("Erase curve")
+            self.canvas.delete(key)
+            self.curve_index.remove(key)
+            if key in self.raster_curves:
+                self.framebuffer.draw_pixels(
+                    self.raster_curves.pop(key), self.framebuffer.background
                 )
-        logging.info("Draw in " + self.selected_mode + " Mode")
-        if self.selected_mode != "Wu":
-            for i in self.points:
+                self._present()
+
+    def _curve_click(self, event) -> None:
+        # Left clicks add control points, dragging one reshapes the curve
+        # and a right click finishes it.
+        if self.curve is None:
+            self.curve = self.control_curves[self.selected_mode]()
+        self.dragged_point = self.curve.nearest(event, radius=5)
+        if self.dragged_point is None:
+            self.curve.append(event)
+        self._redraw_curve()
+
+    def _curve_drag(self, event) -> None:
+        if self.curve is not None and self.dragged_point is not None:
+            self.curve.move(self.dragged_point, event)
+            self._redraw_curve()
+
+    def _curve_release(self, event) -> None:
+        self.dragged_point = None
+
+    def _curve_finish(self, event=None) -> None:
+        if self.curve is not None:
+            self.canvas.delete("curve_control")
+            if self._rasterized(()) and not self.simplify_enabled.get():
+                # The finished curve moves from canvas items to the framebuffer.
+                self.canvas.delete("curve")
+                self.drawn_spans = PixelSet()
+                self._draw_pixels(self.points)
+            self.canvas.dtag("curve", "curve")
+            logging.info("Draw in " + self.selected_mode + " Mode")
+        self.curve = None
+        self.dragged_point = None
+
+    def _redraw_curve(self) -> None:
+        self.canvas.delete("curve")
+        self.canvas.delete("curve_control")
+        for x, y in self.curve.controls.tolist():
+            self.canvas.create_rectangle(
+                x - 2, y - 2, x + 2, y + 2, outline="gray", tags="curve_control"
+            )
+        samples = self.curve.samples()
+        self.arc_table = ArcLengthTable(samples.coords)
+        self.points = rasterize_polyline(samples)
+        self.drawn_spans = PixelSet()
+        self.overdraw = 0
+        if self.simplify_enabled.get():
+            self._draw_polylines([samples], tags="curve")
+        else:
+            self._draw_pixels(self.points, tags="curve")
+
+    def _draw_pixels(self, pixels, tags=()) -> None:
+        if self.spans_enabled.get() and pixels.values is None:
+            self._draw_spans(pixels, tags=tags)
+        elif self._rasterized(tags):
+            self.framebuffer.draw_pixels(pixels, self._rgb(self.selected_color))
+            self._remember(tags, pixels)
+            self._present()
+        elif pixels.values is None:
+            for x, y in pixels.coords.tolist():
                 self.canvas.create_line(
-                    i[0], i[1], i[0] + 1, i[1] + 1, fill=self.selected_color, width=2
+                    x, y, x + 1, y + 1, fill=self.selected_color, width=2, tags=tags
                 )
         else:
-            s1 = 1 if self.points[-1][0] > self.points[0][0] else -1
-            s2 = 1 if self.points[-1][1] > self.points[0][1] else -1
+            for (x, y), level in zip(pixels.coords.tolist(), pixels.values.tolist()):
+                self.canvas.create_rectangle(
+                    x, y, x + 1, y + 1, fill=COVERAGE_COLORS[level]
+                )
 
-            k = (self.points[-1][1] - self.points[0][1]) / (
-                self.points[-1][0] - self.points[0][0]
+    def _draw_polylines(self, polylines, tags=()) -> None:
+        for polyline in polylines:
+            if len(polyline) == 0:
+                continue
+            coords = simplify(polyline, self.simplify_tolerance).coords.ravel().tolist()
+            if len(coords) == 2:
+                coords += [coords[0] + 1, coords[1] + 1]
+            self.canvas.create_line(
+                *coords, fill=self.selected_color, width=2, tags=tags
             )
-            b = self.points[-1][1] - self.points[-1][0] * k
-            for i in range(len(self.points)):
-                if change_flag:
-                    self.additional[i] = (
-                        self.additional[i][0] - 10 * s1,
-                        self.additional[i][1],
-                        abs(self.points[i][0] * k + b - self.points[i][1]),
-                    )
-                else:
-                    self.additional[i] = (
-                        self.additional[i][0],
-                        self.additional[i][1] - 10 * s2,
-                        abs(self.points[i][0] * k + b - self.points[i][1]),
-                    )
-            for i in range(len(self.points)):
-                color_1 = "#%02x%02x%02x" % (
-                    abs(int(255 * self.additional[i][2])),
-                    abs(int(255 * self.additional[i][2])),
-                    abs(int(255 * self.additional[i][2])),
-                )
 
-                color_2 = "#%02x%02x%02x" % (
-                    abs(int(255 * (1 - self.additional[i][2]))),
-                    abs(int(255 * (1 - self.additional[i][2]))),
-                    abs(int(255 * (1 - self.additional[i][2]))),
-                )
+    def _draw_spans(self, pixels, tags=()) -> None:
+        # Pixels repeated within the shape, or drawn by an earlier chunk of
+        # it, are left out.
+        spans = PixelSet.from_pixels(pixels).difference(self.drawn_spans)
+        self.drawn_spans = self.drawn_spans.union(spans)
+        self.overdraw += len(pixels) - len(spans)
+        self._draw_runs(spans.to_runs(), tags=tags)
+
+    def _draw_runs(self, runs, tags=()) -> None:
+        if self._rasterized(tags):
+            self.framebuffer.draw_runs(runs, self._rgb(self.selected_color))
+            self._remember(tags, runs.to_pixels())
+            self._present()
+            return
+        for x_1, y_1, x_2, y_2 in zip(*(side.tolist() for side in runs.rectangles())):
+            self.canvas.create_rectangle(
+                x_1,
+                y_1,
+                x_2,
+                y_2,
+                fill=self.selected_color,
+                outline=self.selected_color,
+                tags=tags,
+            )
 
-                self.canvas.create_rectangle(
-                    self.points[i][0],
-                    self.points[i][1],
-                    self.points[i][0] + 1,
-                    self.points[i][1] + 1,
-                    fill=color_1,
-                )
-                self.canvas.create_rectangle(
-                    self.additional[i][0],
-                    self.additional[i][1],
-                    self.additional[i][0] + 1,
-                    self.additional[i][1] + 1,
-                    fill=color_2,
-                )
-        delattr(self, "draw")
+    def _rasterized(self, tags) -> bool:
+        # The live preview of a control point curve is replaced on every drag,
+        # so it stays as canvas items until it is finished.
+        return self.framebuffer_enabled.get() and tags != "curve"
+
+    def _remember(self, tags, pixels) -> None:
+        if tags in self.raster_curves:
+            pixels = Pixels.concatenate([self.raster_curves[tags], pixels])
+        if tags:
+            self.raster_curves[tags] = pixels
+
+    def _rgb(self, color):
+        return tuple(value >> 8 for value in self.window.winfo_rgb(color))
+
+    def _show_framebuffer(self) -> None:
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+        self._present()
+
+    def _present(self) -> None:
+        # Only the part of the framebuffer written since the last call is
+        # sent to the image.
+        update = self.framebuffer.flush()
+        if update is not None:
+            (x, y, _, _), data = update
+            self.photo.tk.call(self.photo, "put", data, "-format", "ppm", "-to", x, y)
+
+    def _points(self):
+        if self.points is None:
+            self.points = self.replay()
+        return self.points
 
     def run(self):
         self.window.mainloop()
@@ -218,123 +450,24 @@ class Paint:
             self.debug_window, width=1000, height=1000, background="white"
         )
         self.debug_canvas.grid()
-        if self.selected_mode == "Wu":
-            self.additional = self.old_additional
-            sign_x = 1
-            sign_y = 1
-            if self.additional[-1][0] - self.additional[0][0] < 0:
-                sign_x = -1
-            if self.additional[-1][1] - self.additional[0][1] < 0:
-                sign_y = -1
-
-            prev_x = self.additional[0][0]
-            prev_y = self.additional[0][1]
-
-            prev_add_x = self.additional[0][0]
-            prev_add_y = self.additional[0][1]
-
-            pixels = list(self.additional)
-            x = 0
-            y = 0
-            for i in range(len(self.additional)):
-                if pixels[i][0] == prev_x:
-                    self.additional[i] = (
-                        prev_add_x, prev_add_y, self.additional[i][2])
-                else:
-                    self.additional[i] = (
-                        pixels[i][0] + 10 * x * sign_x,
-                        prev_add_y,
-                        self.additional[i][2],
-                    )
-                    prev_add_x = pixels[i][0] + 10 * x * sign_x
-                    prev_x = pixels[i][0]
-                    x += 1
-
-                if pixels[i][1] == prev_y:
-                    self.additional[i] = (
-                        prev_add_x, prev_add_y, self.additional[i][2])
-                else:
-                    self.additional[i] = (
-                        prev_add_x,
-                        pixels[i][1] + 10 * y * sign_y,
-                        self.additional[i][2],
-                    )
-                    prev_add_y = pixels[i][1] + 10 * y * sign_y
-                    prev_y = pixels[i][1]
-                    y += 1
-        sign_x = 1
-        sign_y = 1
-        if self.points[-1][0] - self.points[0][0] < 0:
-            sign_x = -1
-        if self.points[-1][1] - self.points[0][1] < 0:
-            sign_y = -1
-
-        prev_x = self.points[0][0]
-        prev_y = self.points[0][1]
-
-        prev_add_x = self.points[0][0]
-        prev_add_y = self.points[0][1]
-
-        pixels = list(self.points)
-        x = 0
-        y = 0
-        for i in range(len(self.points)):
-            if pixels[i][0] == prev_x:
-                self.points[i] = (prev_add_x, prev_add_y)
-            else:
-                self.points[i] = (pixels[i][0] + 10 * x * sign_x, prev_add_y)
-                prev_add_x = pixels[i][0] + 10 * x * sign_x
-                prev_x = pixels[i][0]
-                x += 1
-
-            if pixels[i][1] == prev_y:
-                self.points[i] = (prev_add_x, prev_add_y)
-            else:
-                self.points[i] = (prev_add_x, pixels[i][1] + 10 * y * sign_y)
-                prev_add_y = pixels[i][1] + 10 * y * sign_y
-                prev_y = pixels[i][1]
-                y += 1
+        # Every pixel becomes a 10x10 cell, one pixel apart from its neighbours.
+        points = self._points()
+        origin = points.coords[0]
+        cells = ((points.coords - origin) * 11 + origin).tolist()
+        if points.values is None:
+            colors = ["black"] * len(cells)
+            step = 1
+        else:
+            colors = [COVERAGE_COLORS[level] for level in points.values.tolist()]
+            step = 2
 
         def debug_draw(*args):
-            if self.selected_mode != "Wu":
+            for _ in range(min(step, len(cells))):
+                x, y = cells.pop(0)
                 self.debug_canvas.create_rectangle(
-                    self.points[0][0],
-                    self.points[0][1],
-                    self.points[0][0] + 10,
-                    self.points[0][1] + 10,
-                    fill="black",
-                )
-                del self.points[0]
-            else:
-                color_1 = "#%02x%02x%02x" % (
-                    abs(int(255 * self.additional[0][2])),
-                    abs(int(255 * self.additional[0][2])),
-                    abs(int(255 * self.additional[0][2])),
+                    x, y, x + 10, y + 10, fill=colors.pop(0)
                 )
 
-                color_2 = "#%02x%02x%02x" % (
-                    abs(int(255 * (1 - self.additional[0][2]))),
-                    abs(int(255 * (1 - self.additional[0][2]))),
-                    abs(int(255 * (1 - self.additional[0][2]))),
-                )
-
-                self.debug_canvas.create_rectangle(
-                    self.points[0][0],
-                    self.points[0][1],
-                    self.points[0][0] + 10,
-                    self.points[0][1] + 10,
-                    fill=color_1,
-                )
-                self.debug_canvas.create_rectangle(
-                    self.additional[0][0],
-                    self.additional[0][1],
-                    self.additional[0][0] + 10,
-                    self.additional[0][1] + 10,
-                    fill=color_2,
-                )
-                self.points.pop(0)
-                self.additional.pop(0)
-
         self.next_button.bind("<Button-1>", debug_draw)
 
     def debug_cool_lines(self):
@@ -350,17 +483,18 @@ class Paint:
         )
         self.debug_canvas.grid()
 
+        # Curves are replayed at a constant two pixels per frame along their
+        # arc length, other shapes pixel by pixel.
+        if getattr(self, "arc_table", None) is not None:
+            points = self.arc_table.spaced(2.0).coords.tolist()
+        else:
+            points = self._points().coords.tolist()
+
         def draw_point(*args):
-            if not self.points:
+            if not points:
                 self.debug_window.mainloop()
-            self.debug_canvas.create_rectangle(
-                self.points[0][0],
-                self.points[0][1],
-                self.points[0][0],
-                self.points[0][1],
-                fill="black",
-            )
-            self.points.pop(0)
+            x, y = points.pop(0)
+            self.debug_canvas.create_rectangle(x, y, x, y, fill="black")
             self.debug_window.after(10, draw_point)
 
         try:
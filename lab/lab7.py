@@ -60,6 +60,33 @@ def clip_line(x1, y1, x2, y2, canvas_width, canvas_height):
     return x1, y1, x2, y2
 
 
+def clip_lines(segments, canvas_width, canvas_height):
+    # Liang-Barsky over the whole (N, 4) array at once: every segment is
+    # x = x1 + t * dx, y = y1 + t * dy and each canvas edge gives p * t <= q.
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = segments.T
+    dx = x2 - x1
+    dy = y2 - y1
+
+    p = np.stack((-dx, dx, -dy, dy))
+    q = np.stack((x1, canvas_width - x1, y1, canvas_height - y1))
+
+    # Edges parallel to a segment (vertical and horizontal ones included)
+    # give no parameter bound, only an inside/outside test.
+    visible = ~np.any((p == 0) & (q < 0), axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = q / p
+    t_enter = np.max(np.where(p < 0, t, 0), axis=0)
+    t_leave = np.min(np.where(p > 0, t, 1), axis=0)
+    visible &= t_enter <= t_leave
+
+    clipped = np.stack(
+        (x1 + t_enter * dx, y1 + t_enter * dy, x1 + t_leave * dx, y1 + t_leave * dy),
+        axis=1,
+    )
+    return clipped, visible
+
+
 def is_point_inside_polygon(x, y, polygon):
     num_vertices = len(polygon.points)
     intersections = 0
@@ -378,21 +405,20 @@ class GraphicsEditor2D:
             points.append((line[i], line[i + 1]))
 
         vor = Voronoi(np.array(points))
-        for ridge in vor.ridge_vertices:
-            if -1 not in ridge:
-                x1, y1, x2, y2 = clip_line(
-                    vor.vertices[ridge[0]][0],
-                    vor.vertices[ridge[0]][1],
-                    vor.vertices[ridge[1]][0],
-                    vor.vertices[ridge[1]][1],
-                    self.width,
-                    self.height,
-                )
-                x1 = ((x1 // self.grid_size) * self.grid_size) + (self.grid_size // 2)
-                y1 = ((y1 // self.grid_size) * self.grid_size) + (self.grid_size // 2)
-                x2 = ((x2 // self.grid_size) * self.grid_size) + (self.grid_size // 2)
-                y2 = ((y2 // self.grid_size) * self.grid_size) + (self.grid_size // 2)
-                self.draw_line_bresenham(x1, y1, x2, y2)
+        ridges = np.array([ridge for ridge in vor.ridge_vertices if -1 not in ridge])
+        if not len(ridges):
+            return
+        segments, visible = clip_lines(
+            np.hstack((vor.vertices[ridges[:, 0]], vor.vertices[ridges[:, 1]])),
+            self.width,
+            self.height,
+        )
+        for x1, y1, x2, y2 in segments[visible].tolist():
+            x1 = ((x1 // self.grid_size) * self.grid_size) + (self.grid_size // 2)
+            y1 = ((y1 // self.grid_size) * self.grid_size) + (self.grid_size // 2)
+            x2 = ((x2 // self.grid_size) * self.grid_size) + (self.grid_size // 2)
+            y2 = ((y2 // self.grid_size) * self.grid_size) + (self.grid_size // 2)
+            self.draw_line_bresenham(x1, y1, x2, y2)
 
     def draw_line_bresenham(self, x1, y1, x2, y2):
         dx = int(abs(x2 - x1) / self.grid_size)
@@ -1,11 +1,37 @@
-def Bresenham(start, end):
+import numpy as np
+
+from raster.Clip import clip_steps, crop
+from raster.PatternCache import PATTERN_LIMIT, PatternCache
+from raster.Pixels import Pixels, split_chunks
+
+# Offsets from the start point, keyed on (dx, dy).
+bresenham_patterns = PatternCache()
+
+
+def Bresenham(start, end, viewport=None):
+    return Pixels.concatenate(bresenham_chunks(start, end, viewport=viewport))
+
+
+def bresenham_chunks(start, end, chunk_size=4096, viewport=None):
+    if max(abs(end.x - start.x), abs(end.y - start.y)) < PATTERN_LIMIT:
+        pixels = bresenham_cached(start, end)
+        if viewport is not None:
+            pixels = crop(pixels, viewport)
+        yield from pixels.chunks(chunk_size)
+        return
+
+    if viewport is not None:
+        yield from bresenham_clipped(start, end, viewport).chunks(chunk_size)
+        return
+
     x = start.x
     y = start.y
 
     dx = abs(end.x - start.x)
     dy = abs(end.y - start.y)
 
-    points = []
+    xs = []
+    ys = []
 
     s1 = 1 if end.x > start.x else -1
     s2 = 1 if end.y > start.y else -1
@@ -19,7 +45,10 @@ def Bresenham(start, end):
     e = 2 * dy - dx
 
     for _ in range(dx + 1):
-        points.append((x, y))
+        xs.append(x)
+        ys.append(y)
+        if len(xs) >= chunk_size:
+            yield from split_chunks(xs, ys, chunk_size)
         while e >= 0:
             if change_flag:
                 x += s1
@@ -32,4 +61,92 @@ def Bresenham(start, end):
             x += s1
         e += 2 * dy
 
-    return points
+    if xs:
+        yield Pixels(xs, ys)
+
+
+def bresenham_batch(segments):
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    x_1, y_1, x_2, y_2 = segments.T
+
+    dx = np.abs(x_2 - x_1)
+    dy = np.abs(y_2 - y_1)
+
+    s1 = np.where(x_2 > x_1, 1, -1)
+    s2 = np.where(y_2 > y_1, 1, -1)
+
+    change_flag = dy > dx
+    major = np.maximum(dx, dy)
+    minor = np.minimum(dx, dy)
+
+    counts = major + 1
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    # int32 arithmetic is several times faster, use it whenever the error
+    # terms below cannot overflow.
+    if offsets[-1] < 2**31 and 2 * major.max(initial=0) ** 2 < 2**31:
+        dtype = np.int32
+    else:
+        dtype = np.int64
+
+    def per_pixel(values):
+        return np.repeat(values.astype(dtype), counts)
+
+    # The error term of the scalar loop crosses zero floor((2 * minor * i +
+    # major) / (2 * major)) times before step i, so every pixel follows
+    # directly from its step index.
+    step = np.arange(offsets[-1], dtype=dtype)
+    step -= per_pixel(offsets[:-1])
+    minor_step = per_pixel(2 * minor) * step
+    minor_step += per_pixel(major)
+    minor_step //= per_pixel(np.maximum(2 * major, 1))
+
+    xs = per_pixel(np.where(change_flag, 0, s1)) * step
+    xs += per_pixel(np.where(change_flag, s1, 0)) * minor_step
+    xs += per_pixel(x_1)
+    ys = per_pixel(np.where(change_flag, s2, 0)) * step
+    ys += per_pixel(np.where(change_flag, 0, s2)) * minor_step
+    ys += per_pixel(y_1)
+
+    return xs.astype(np.int32, copy=False), ys.astype(np.int32, copy=False), offsets
+
+
+def bresenham_cached(start, end):
+    dx = end.x - start.x
+    dy = end.y - start.y
+
+    def build():
+        xs, ys, _ = bresenham_batch([[0, 0, dx, dy]])
+        return np.column_stack((xs, ys))
+
+    pattern = bresenham_patterns.get((dx, dy), build)
+    return Pixels.from_coords(pattern + np.array([start.x, start.y], dtype=np.int32))
+
+
+def bresenham_clipped(start, end, viewport):
+    dx = abs(end.x - start.x)
+    dy = abs(end.y - start.y)
+
+    s1 = 1 if end.x > start.x else -1
+    s2 = 1 if end.y > start.y else -1
+
+    change_flag = dy > dx
+    major = max(dx, dy)
+    minor = min(dx, dy)
+
+    # Pixels stray at most half a pixel from the line along the minor axis.
+    visible = clip_steps(start.x, start.y, end.x, end.y, major, viewport)
+    if visible is None:
+        return Pixels([], [])
+
+    step = np.arange(visible[0], min(visible[1], major) + 1)
+    minor_step = (2 * minor * step + major) // max(2 * major, 1)
+    if change_flag:
+        xs = start.x + s1 * minor_step
+        ys = start.y + s2 * step
+    else:
+        xs = start.x + s1 * step
+        ys = start.y + s2 * minor_step
+
+    return crop(Pixels(xs, ys), viewport)
@@ -1,22 +1,116 @@
-def DDA(start, end):
+import numpy as np
+
+from raster.Clip import clip_steps, crop
+from raster.Pixels import Pixels
+from raster.Rasterize import join_segments
+
+FRACTION_BITS = 16
+ONE = 1 << FRACTION_BITS
+HALF = ONE >> 1
+
+
+def DDA(start, end, viewport=None):
+    return Pixels.concatenate(dda_chunks(start, end, viewport=viewport))
+
+
+def dda_chunks(start, end, chunk_size=4096, viewport=None):
     x_1 = start.x
     y_1 = start.y
 
     x_2 = end.x
     y_2 = end.y
 
-    length = max(abs(x_1 - x_2), abs(y_1 - y_2))
+    # A zero-length segment still plots its single point.
+    length = max(abs(x_1 - x_2), abs(y_1 - y_2), 1)
+
+    # Step i plots the start moved i increments along, truncated, from the
+    # first increment on. Each step is computed from its index rather than by
+    # summing increments, so a viewport can jump straight to its visible ones.
+    first, last = 1, length
+    if viewport is not None:
+        visible = clip_steps(x_1, y_1, x_2, y_2, length, viewport)
+        if visible is None:
+            return
+        first = max(first, visible[0])
+        last = min(last, visible[1])
+
+    for low in range(first, last + 1, chunk_size):
+        step = np.arange(low, min(low + chunk_size, last + 1))
+        pixels = Pixels(
+            (x_1 + (x_2 - x_1) * step / length).astype(np.int32),
+            (y_1 + (y_2 - y_1) * step / length).astype(np.int32),
+        )
+        yield pixels if viewport is None else crop(pixels, viewport)
+
+
+def dda_fixed(start, end, viewport=None):
+    return Pixels.concatenate(dda_fixed_chunks(start, end, viewport=viewport))
+
+
+def dda_fixed_chunks(start, end, chunk_size=4096, viewport=None):
+    x_1, y_1, x_2, y_2 = (
+        round(value * ONE) for value in (start.x, start.y, end.x, end.y)
+    )
+    length = max(
+        abs(((x_2 + HALF) >> FRACTION_BITS) - ((x_1 + HALF) >> FRACTION_BITS)),
+        abs(((y_2 + HALF) >> FRACTION_BITS) - ((y_1 + HALF) >> FRACTION_BITS)),
+    )
+
+    first, last = 0, length
+    if viewport is not None:
+        visible = clip_steps(
+            x_1, y_1, x_2, y_2, length, [side * ONE for side in viewport], margin=ONE
+        )
+        if visible is None:
+            return
+        first = visible[0]
+        last = min(visible[1], length)
+
+    # The same step expression as dda_batch, over one range of steps at a time.
+    divisor = max(length, 1)
+    for low in range(first, last + 1, chunk_size):
+        step = np.arange(low, min(low + chunk_size, last + 1))
+        pixels = Pixels(
+            (x_1 + (x_2 - x_1) * step // divisor + HALF) >> FRACTION_BITS,
+            (y_1 + (y_2 - y_1) * step // divisor + HALF) >> FRACTION_BITS,
+        )
+        yield pixels if viewport is None else crop(pixels, viewport)
+
+
+def dda_batch(segments):
+    # Endpoints may be subpixel, they are snapped to a 16.16 grid and every
+    # pixel of every segment is then evaluated at once from its step index.
+    segments = np.round(np.asarray(segments, dtype=np.float64).reshape(-1, 4) * ONE)
+    x_1, y_1, x_2, y_2 = segments.astype(np.int64).T
+
+    length = np.maximum(
+        np.abs(((x_2 + HALF) >> FRACTION_BITS) - ((x_1 + HALF) >> FRACTION_BITS)),
+        np.abs(((y_2 + HALF) >> FRACTION_BITS) - ((y_1 + HALF) >> FRACTION_BITS)),
+    )
+
+    counts = length + 1
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    # Scaling the whole delta by the step index before dividing keeps the
+    # fixed-point accumulator exact instead of summing a rounded increment.
+    step = np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+    divisor = np.repeat(np.maximum(length, 1), counts)
+    xs = np.repeat(x_1, counts) + np.repeat(x_2 - x_1, counts) * step // divisor
+    ys = np.repeat(y_1, counts) + np.repeat(y_2 - y_1, counts) * step // divisor
+
+    return (
+        ((xs + HALF) >> FRACTION_BITS).astype(np.int32),
+        ((ys + HALF) >> FRACTION_BITS).astype(np.int32),
+        offsets,
+    )
 
-    dx = (x_2 - x_1) / length
-    dy = (y_2 - y_1) / length
 
-    i = 0
-    points = list()
-    curr_x, curr_y = x_1, y_1
-    while i < length:
-        points.append((int(curr_x + dx), int(curr_y + dy)))
-        curr_x = curr_x + dx
-        curr_y = curr_y + dy
-        i += 1
+def dda_polyline(points):
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 2:
+        points = np.floor(points + 0.5)
+        return Pixels(points[:, 0], points[:, 1])
 
-    return points
+    xs, ys = join_segments(*dda_batch(np.hstack((points[:-1], points[1:]))))
+    return Pixels(xs, ys)
@@ -0,0 +1,58 @@
+from raster.Runs import Runs
+
+
+def RunSlice(start, end, viewport=None):
+    dx = abs(end.x - start.x)
+    dy = abs(end.y - start.y)
+
+    s1 = 1 if end.x > start.x else -1
+    s2 = 1 if end.y > start.y else -1
+
+    if dy > dx:
+        dx, dy = dy, dx
+        major, minor = start.y, start.x
+        major_sign, minor_sign = s2, s1
+        change_flag = True
+    else:
+        major, minor = start.x, start.y
+        major_sign, minor_sign = s1, s2
+        change_flag = False
+
+    # Run k holds the Bresenham steps whose minor offset is k, it begins at
+    # step ceil(dx * (2k - 1) / (2dy)). Consecutive boundaries differ by
+    # dx // dy plus one when the remainder wraps, which is the only decision
+    # made per run.
+    run_starts = [0]
+    if dy:
+        whole_step = dx // dy
+        adjust_up = 2 * (dx % dy)
+        adjust_down = 2 * dy
+        boundary = -(-dx // adjust_down)
+        error = boundary * adjust_down - dx
+        for _ in range(dy):
+            run_starts.append(boundary)
+            boundary += whole_step
+            error -= adjust_up
+            if error < 0:
+                boundary += 1
+                error += adjust_down
+    run_starts.append(dx + 1)
+
+    majors = []
+    minors = []
+    lengths = []
+    for k in range(len(run_starts) - 1):
+        length = run_starts[k + 1] - run_starts[k]
+        first = major + major_sign * run_starts[k]
+        last = major + major_sign * (run_starts[k + 1] - 1)
+        majors.append(min(first, last))
+        minors.append(minor + minor_sign * k)
+        lengths.append(length)
+
+    if change_flag:
+        runs = Runs(minors, majors, lengths, horizontal=False)
+    else:
+        runs = Runs(majors, minors, lengths, horizontal=True)
+    if viewport is not None:
+        return runs.crop(viewport)
+    return runs
@@ -1,58 +1,90 @@
-def Wu(start, end):
-    x = start.x
-    y = start.y
+import numpy as np
 
-    dx = abs(end.x - start.x)
-    dy = abs(end.y - start.y)
+from raster.Clip import clip_steps, crop
+from raster.Pixels import Pixels
 
-    points = []
+FRACTION_BITS = 16
+ONE = 1 << FRACTION_BITS
+HALF = ONE >> 1
+MASK = ONE - 1
 
-    s1 = 1 if end.x > start.x else -1
-    s2 = 1 if end.y > start.y else -1
+# Tk fill colour for every 8-bit coverage level, 0 is white and 255 is black.
+COVERAGE_COLORS = ["#%02x%02x%02x" % ((255 - level,) * 3) for level in range(256)]
 
-    if dy > dx:
-        dx, dy = dy, dx
-        change_flag = True
-    else:
-        change_flag = False
 
-    e = 2 * dy - dx
+def Wu(start, end, viewport=None):
+    x_1 = round(start.x * ONE)
+    y_1 = round(start.y * ONE)
+    x_2 = round(end.x * ONE)
+    y_2 = round(end.y * ONE)
 
-    additional = []
+    change_flag = abs(y_2 - y_1) > abs(x_2 - x_1)
+    if change_flag:
+        x_1, y_1 = y_1, x_1
+        x_2, y_2 = y_2, x_2
+    if x_1 > x_2:
+        x_1, x_2 = x_2, x_1
+        y_1, y_2 = y_2, y_1
 
-    for i in range(dx + 1):
-        if change_flag:
-            points.append((x, y))
-            additional.append((x, y + s2))
-        else:
-            points.append((x, y))
-            additional.append((x + s1, y))
-        while e >= 0:
-            if change_flag:
-                x += s1
-            else:
-                y += s2
-            e -= 2 * dx
-        if change_flag:
-            y += s2
-        else:
-            x += s1
-        e += 2 * dy
-
-    k = (end.y - start.y) / (end.x - start.x)
-    b = start.y - start.x * k
-    for i in range(len(points)):
+    dx = x_2 - x_1
+    dy = y_2 - y_1
+    gradient = (dy << FRACTION_BITS) // dx if dx else 0
+
+    majors = []
+    minors = []
+    levels = []
+
+    def plot_pair(major, intery, weight):
+        # The line covers the pixel below intery by its reversed fraction
+        # and the one above by the fraction itself, scaled by weight.
+        fraction = intery & MASK
+        majors.extend((major, major))
+        minors.extend((intery >> FRACTION_BITS, (intery >> FRACTION_BITS) + 1))
+        levels.extend((((MASK - fraction) * weight) >> 24, (fraction * weight) >> 24))
+
+    x_start = (x_1 + HALF) >> FRACTION_BITS
+    y_start = y_1 + ((gradient * ((x_start << FRACTION_BITS) - x_1)) >> FRACTION_BITS)
+    plot_pair(x_start, y_start, MASK - ((x_1 + HALF) & MASK))
+
+    x_end = (x_2 + HALF) >> FRACTION_BITS
+    y_end = y_2 + ((gradient * ((x_end << FRACTION_BITS) - x_2)) >> FRACTION_BITS)
+
+    loop_start = x_start + 1
+    loop_end = x_end
+    if viewport is not None:
+        x_min, y_min, x_max, y_max = viewport
         if change_flag:
-            additional[i] = (
-                additional[i][0] + 10 * s1,
-                additional[i][1],
-                abs(points[i][0] * k + b - points[i][1]),
-            )
-        else:
-            additional[i] = (
-                additional[i][0],
-                additional[i][1] + 10 * s2,
-                abs(points[i][0] * k + b - points[i][1]),
-            )
-
-    return points, additional, change_flag
+            x_min, y_min, x_max, y_max = y_min, x_min, y_max, x_max
+        # Each pair reaches at most one pixel past the line on either side.
+        visible = clip_steps(
+            x_start * ONE,
+            y_start,
+            x_end * ONE,
+            y_end,
+            x_end - x_start,
+            (x_min * ONE, y_min * ONE, x_max * ONE, y_max * ONE),
+            margin=2 * ONE,
+        )
+        if visible is None:
+            return Pixels([], [], [], values_dtype=np.uint8)
+        loop_start = max(loop_start, x_start + visible[0])
+        loop_end = min(loop_end, x_start + visible[1] + 1)
+
+    intery = y_start + gradient * (loop_start - x_start)
+    for x in range(loop_start, loop_end):
+        fraction = (intery >> 8) & 0xFF
+        majors.extend((x, x))
+        minors.extend((intery >> FRACTION_BITS, (intery >> FRACTION_BITS) + 1))
+        levels.extend((255 - fraction, fraction))
+        intery += gradient
+
+    if x_end != x_start:
+        plot_pair(x_end, y_end, (x_2 + HALF) & MASK)
+
+    if change_flag:
+        pixels = Pixels(minors, majors, levels, values_dtype=np.uint8)
+    else:
+        pixels = Pixels(majors, minors, levels, values_dtype=np.uint8)
+    if viewport is not None:
+        return crop(pixels, viewport)
+    return pixels
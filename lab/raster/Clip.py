@@ -0,0 +1,65 @@
+from raster.Pixels import Pixels
+
+# A viewport is (x_min, y_min, x_max, y_max) with the max edges excluded, so
+# the 800x600 Paint canvas is (0, 0, 800, 600).
+
+
+def clip_steps(x_1, y_1, x_2, y_2, steps, viewport, margin=1):
+    # Integer Liang-Barsky: the segment is walked in `steps` equal steps and
+    # the returned (first, last) range holds every step whose point on the
+    # exact line lies within `margin` of the viewport. Rasterizers whose
+    # pixels stay within `margin` of the line therefore lose nothing visible.
+    x_min, y_min, x_max, y_max = viewport
+    steps = max(steps, 1)
+    dx = x_2 - x_1
+    dy = y_2 - y_1
+
+    first = 0
+    last = steps
+    for p, q in (
+        (-dx, (x_1 - x_min + margin) * steps),
+        (dx, (x_max - 1 + margin - x_1) * steps),
+        (-dy, (y_1 - y_min + margin) * steps),
+        (dy, (y_max - 1 + margin - y_1) * steps),
+    ):
+        # Every inequality has the form p * step <= q.
+        if p == 0:
+            if q < 0:
+                return None
+        elif p > 0:
+            last = min(last, q // p)
+        else:
+            first = max(first, -(-q // p))
+        if first > last:
+            return None
+    return first, last
+
+
+def box_outside(x_min, y_min, x_max, y_max, viewport):
+    return (
+        x_max < viewport[0]
+        or y_max < viewport[1]
+        or x_min >= viewport[2]
+        or y_min >= viewport[3]
+    )
+
+
+def box_inside(x_min, y_min, x_max, y_max, viewport):
+    return (
+        x_min >= viewport[0]
+        and y_min >= viewport[1]
+        and x_max < viewport[2]
+        and y_max < viewport[3]
+    )
+
+
+def crop(pixels, viewport):
+    x_min, y_min, x_max, y_max = viewport
+    xs = pixels.xs
+    ys = pixels.ys
+    mask = (xs >= x_min) & (xs < x_max) & (ys >= y_min) & (ys < y_max)
+    if mask.all():
+        return pixels
+    return Pixels.from_coords(
+        pixels.coords[mask], None if pixels.values is None else pixels.values[mask]
+    )
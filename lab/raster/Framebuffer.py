@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class Framebuffer:
+    # An (H, W, 3) RGB image the rasterizers write into directly. The box
+    # around everything written since the last flush is kept as `dirty`, so
+    # only that part has to be sent to the screen.
+    def __init__(self, width, height, background=(255, 255, 255)):
+        self.width = width
+        self.height = height
+        self.background = np.asarray(background, dtype=np.uint8)
+        self.pixels = np.empty((height, width, 3), dtype=np.uint8)
+        self.clear()
+
+    def clear(self):
+        self.pixels[:] = self.background
+        self.dirty = (0, 0, self.width, self.height)
+
+    def _touch(self, x_min, y_min, x_max, y_max):
+        if self.dirty is not None:
+            x_min = min(x_min, self.dirty[0])
+            y_min = min(y_min, self.dirty[1])
+            x_max = max(x_max, self.dirty[2])
+            y_max = max(y_max, self.dirty[3])
+        self.dirty = (x_min, y_min, x_max, y_max)
+
+    def draw_pixels(self, pixels, color):
+        # Pixels with values are Wu coverage levels and are blended over what
+        # is already there, 255 being the full colour.
+        xs, ys = pixels.xs, pixels.ys
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        xs, ys = xs[inside], ys[inside]
+        if len(xs) == 0:
+            return
+        if pixels.values is None:
+            self.pixels[ys, xs] = color
+        else:
+            alpha = pixels.values[inside].astype(np.float32)[:, None] / 255
+            under = self.pixels[ys, xs]
+            self.pixels[ys, xs] = under + alpha * (np.asarray(color) - under) + 0.5
+        self._touch(int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)
+
+    def draw_runs(self, runs, color):
+        runs = runs.crop((0, 0, self.width, self.height))
+        if len(runs) == 0:
+            return
+        runs.fill(self.pixels, color)
+        x_1, y_1, x_2, y_2 = runs.rectangles()
+        self._touch(int(x_1.min()), int(y_1.min()), int(x_2.max()), int(y_2.max()))
+
+    def ppm(self, box):
+        # The box (x_min, y_min, x_max, y_max) as a binary PPM image.
+        x_min, y_min, x_max, y_max = box
+        header = b"P6 %d %d 255\n" % (x_max - x_min, y_max - y_min)
+        return header + self.pixels[y_min:y_max, x_min:x_max].tobytes()
+
+    def flush(self):
+        # The dirty box and its PPM image, or None when nothing changed.
+        if self.dirty is None:
+            return None
+        box = self.dirty
+        self.dirty = None
+        return box, self.ppm(box)
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+
+# Rasterizers cache the patterns of shapes with at most this many pixels.
+# Larger ones are rare to repeat and would crowd out the rest.
+PATTERN_LIMIT = 4096
+
+
+class PatternCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._patterns = OrderedDict()
+
+    def get(self, key, build):
+        pattern = self._patterns.get(key)
+        if pattern is not None:
+            self.hits += 1
+            self._patterns.move_to_end(key)
+            return pattern
+
+        self.misses += 1
+        pattern = build()
+        self._patterns[key] = pattern
+        if len(self._patterns) > self.maxsize:
+            self._patterns.popitem(last=False)
+        return pattern
+
+    def peek(self, key):
+        # The pattern if it is already cached, without building it.
+        pattern = self._patterns.get(key)
+        if pattern is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._patterns.move_to_end(key)
+        return pattern
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._patterns),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+        self._patterns.clear()
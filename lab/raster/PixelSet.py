@@ -0,0 +1,97 @@
+import numpy as np
+
+from raster.Pixels import Pixels
+from raster.Runs import Runs
+
+# Pixel (x, y) has the key y * ROW + x + COLUMN_OFFSET, so the pixels of a row
+# are consecutive keys and runs on different rows can never touch.
+ROW = 1 << 32
+COLUMN_OFFSET = 1 << 31
+
+
+class PixelSet:
+    # A set of pixels stored row by row as sorted, disjoint and non-adjacent
+    # key ranges [start, end). Any ranges passed in are merged into that form,
+    # which is what removes duplicate and overlapping pixels.
+    def __init__(self, starts=(), ends=()):
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        order = np.argsort(starts, kind="stable")
+        starts = starts[order]
+        ends = ends[order]
+        nonempty = ends > starts
+        starts = starts[nonempty]
+        ends = ends[nonempty]
+
+        # A range opens a new run unless it starts inside or right after the
+        # ranges before it.
+        reach = np.maximum.accumulate(ends) if len(ends) else ends
+        opens = np.ones(len(starts), dtype=bool)
+        opens[1:] = starts[1:] > reach[:-1]
+        first = np.flatnonzero(opens)
+        self.starts = starts[first]
+        self.ends = np.maximum.reduceat(ends, first) if len(first) else ends
+
+    @classmethod
+    def from_pixels(cls, pixels):
+        keys = pixels.ys.astype(np.int64) * ROW + pixels.xs + COLUMN_OFFSET
+        return cls(keys, keys + 1)
+
+    @classmethod
+    def from_runs(cls, runs):
+        if not runs.horizontal:
+            return cls.from_pixels(runs.to_pixels())
+        starts = runs.ys.astype(np.int64) * ROW + runs.xs + COLUMN_OFFSET
+        return cls(starts, starts + runs.lengths)
+
+    @classmethod
+    def from_output(cls, output):
+        # Whatever a rasterizer returned: Pixels or Runs.
+        if isinstance(output, Runs):
+            return cls.from_runs(output)
+        return cls.from_pixels(output)
+
+    def __len__(self):
+        return int((self.ends - self.starts).sum())
+
+    def _covers(self, keys):
+        # Runs are disjoint, so a key is covered when more of them start at or
+        # before it than end at or before it.
+        return np.searchsorted(self.starts, keys, "right") > np.searchsorted(
+            self.ends, keys, "right"
+        )
+
+    def _combine(self, other, keep):
+        # Every run boundary of either set splits the keys into pieces that
+        # are wholly inside or outside each set; `keep` picks the pieces.
+        bounds = np.unique(
+            np.concatenate((self.starts, self.ends, other.starts, other.ends))
+        )
+        lows = bounds[:-1]
+        kept = keep(self._covers(lows), other._covers(lows))
+        return PixelSet(lows[kept], bounds[1:][kept])
+
+    def union(self, other):
+        return PixelSet(
+            np.concatenate((self.starts, other.starts)),
+            np.concatenate((self.ends, other.ends)),
+        )
+
+    def difference(self, other):
+        return self._combine(other, lambda mine, theirs: mine & ~theirs)
+
+    def intersection(self, other):
+        return self._combine(other, lambda mine, theirs: mine & theirs)
+
+    def to_runs(self):
+        ys = self.starts // ROW
+        xs = self.starts - ys * ROW - COLUMN_OFFSET
+        return Runs(xs, ys, self.ends - self.starts)
+
+    def to_pixels(self):
+        return self.to_runs().to_pixels()
+
+
+def dedupe(pixels):
+    # The distinct pixels, row by row from the top left.
+    return PixelSet.from_pixels(pixels).to_pixels()
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class Pixels:
+    def __init__(self, xs, ys, values=None, dtype=np.int32, values_dtype=np.float32):
+        self.coords = np.empty((len(xs), 2), dtype=dtype)
+        self.coords[:, 0] = xs
+        self.coords[:, 1] = ys
+        self.values = (
+            None if values is None else np.ascontiguousarray(values, dtype=values_dtype)
+        )
+
+    @classmethod
+    def from_coords(cls, coords, values=None):
+        pixels = cls.__new__(cls)
+        pixels.coords = coords
+        pixels.values = values
+        return pixels
+
+    @property
+    def xs(self):
+        return self.coords[:, 0]
+
+    @property
+    def ys(self):
+        return self.coords[:, 1]
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Pixels.from_coords(
+                self.coords[index],
+                None if self.values is None else self.values[index],
+            )
+        if self.values is None:
+            return tuple(self.coords[index].tolist())
+        return (*self.coords[index].tolist(), self.values[index].item())
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        if copy:
+            return np.array(self.coords, dtype=dtype)
+        return np.asarray(self.coords, dtype=dtype)
+
+    def chunks(self, chunk_size):
+        for start in range(0, len(self), chunk_size):
+            yield self[start : start + chunk_size]
+
+    def tolist(self):
+        if self.values is None:
+            return [tuple(point) for point in self.coords.tolist()]
+        return [
+            (x, y, value)
+            for (x, y), value in zip(self.coords.tolist(), self.values.tolist())
+        ]
+
+    @classmethod
+    def concatenate(cls, chunks, dtype=np.int32):
+        chunks = list(chunks)
+        if not chunks:
+            return cls([], [], dtype=dtype)
+        values = None
+        if chunks[0].values is not None:
+            values = np.concatenate([chunk.values for chunk in chunks])
+        return cls.from_coords(
+            np.concatenate([chunk.coords for chunk in chunks]), values
+        )
+
+
+def split_chunks(xs, ys, chunk_size):
+    while len(xs) >= chunk_size:
+        yield Pixels(xs[:chunk_size], ys[:chunk_size])
+        del xs[:chunk_size]
+        del ys[:chunk_size]
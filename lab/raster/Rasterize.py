@@ -0,0 +1,38 @@
+import numpy as np
+
+from lines.Bresenham import bresenham_batch
+from raster.Pixels import Pixels
+
+
+def join_segments(xs, ys, offsets):
+    # Pixels of consecutive segments laid end to end, segment i running from
+    # offsets[i] to offsets[i + 1]. Each segment starts on the last pixel of
+    # the previous one, so that pixel is dropped from all but the first.
+    keep = np.ones(len(xs), dtype=bool)
+    keep[offsets[1:-1]] = False
+    return xs[keep], ys[keep]
+
+
+def rasterize_polyline(points):
+    # Snap float samples to pixel centres, bridge every jump between
+    # consecutive samples with Bresenham and keep each pixel once, in the
+    # order it is first reached.
+    points = np.floor(np.asarray(points, dtype=np.float64).reshape(-1, 2) + 0.5)
+    points = points.astype(np.int64)
+    if len(points) == 0:
+        return Pixels([], [])
+
+    moved = np.any(points[1:] != points[:-1], axis=1)
+    points = points[np.concatenate(([True], moved))]
+    if len(points) == 1:
+        return Pixels(points[:, 0], points[:, 1])
+
+    xs, ys = join_segments(*bresenham_batch(np.hstack((points[:-1], points[1:]))))
+
+    # A self-crossing curve revisits pixels, drop the later visits.
+    x_min = xs.min()
+    y_min = ys.min()
+    keys = (xs.astype(np.int64) - x_min) * (int(ys.max()) - y_min + 1) + (ys - y_min)
+    _, first = np.unique(keys, return_index=True)
+    first.sort()
+    return Pixels(xs[first], ys[first])
@@ -0,0 +1,69 @@
+import numpy as np
+
+from raster.Pixels import Pixels
+
+
+class Runs:
+    # Horizontal runs start at (x, y) and cover `length` pixels to the right,
+    # vertical ones cover `length` pixels downwards.
+    def __init__(self, xs, ys, lengths, horizontal=True):
+        self.xs = np.asarray(xs, dtype=np.int32)
+        self.ys = np.asarray(ys, dtype=np.int32)
+        self.lengths = np.asarray(lengths, dtype=np.int32)
+        self.horizontal = horizontal
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def rectangles(self):
+        if self.horizontal:
+            return self.xs, self.ys, self.xs + self.lengths, self.ys + 1
+        return self.xs, self.ys, self.xs + 1, self.ys + self.lengths
+
+    def to_pixels(self):
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(self.lengths, out=offsets[1:])
+        step = np.arange(offsets[-1]) - np.repeat(offsets[:-1], self.lengths)
+        xs = np.repeat(self.xs, self.lengths)
+        ys = np.repeat(self.ys, self.lengths)
+        if self.horizontal:
+            xs = xs + step
+        else:
+            ys = ys + step
+        return Pixels(xs, ys)
+
+    def crop(self, viewport):
+        x_min, y_min, x_max, y_max = viewport
+        if self.horizontal:
+            across, along, low, high = self.ys, self.xs, x_min, x_max
+            keep = (across >= y_min) & (across < y_max)
+        else:
+            across, along, low, high = self.xs, self.ys, y_min, y_max
+            keep = (across >= x_min) & (across < x_max)
+        first = np.maximum(along, low)
+        last = np.minimum(along + self.lengths, high)
+        keep &= first < last
+        if self.horizontal:
+            xs, ys = first[keep], across[keep]
+        else:
+            xs, ys = across[keep], first[keep]
+        return Runs(xs, ys, (last - first)[keep], self.horizontal)
+
+    def fill(self, buffer, value):
+        # Writes a C-contiguous [y, x] indexed buffer in one assignment,
+        # dropping whatever lies outside it. Each run covers flat indices
+        # from its start in steps of 1 along a row or `width` down a column,
+        # and the channels of a pixel are viewed as one item so whole pixels
+        # are written at once.
+        height, width = buffer.shape[:2]
+        runs = self.crop((0, 0, width, height))
+        offsets = np.zeros(len(runs) + 1, dtype=np.int64)
+        np.cumsum(runs.lengths, out=offsets[1:])
+        step = 1 if runs.horizontal else width
+        starts = runs.ys.astype(np.int64) * width + runs.xs - offsets[:-1] * step
+        index = np.repeat(starts, runs.lengths) + np.arange(offsets[-1]) * step
+
+        pixels = buffer.reshape(height * width, -1)
+        item = np.dtype((np.void, pixels.shape[1] * pixels.itemsize))
+        value = np.full(pixels.shape[1:], value, dtype=buffer.dtype)
+        pixels.view(item)[index, 0] = value.view(item)[0]
@@ -0,0 +1,52 @@
+import numpy as np
+
+from raster.Pixels import Pixels
+
+
+def simplify(points, tolerance=0.5):
+    # Ramer-Douglas-Peucker without recursion: every pending range is split in
+    # the same vectorized pass, so the work is one sweep over the points per
+    # subdivision level and million-point inputs cannot exhaust the stack.
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    keep = np.zeros(len(points), dtype=bool)
+    if len(points) == 0:
+        return Pixels(points[:, 0], points[:, 1], dtype=np.float32)
+    keep[[0, -1]] = True
+
+    firsts = np.array([0])
+    lasts = np.array([len(points) - 1])
+    while True:
+        pending = lasts - firsts >= 2
+        firsts, lasts = firsts[pending], lasts[pending]
+        if len(firsts) == 0:
+            break
+
+        counts = lasts - firsts - 1
+        starts = np.concatenate(([0], np.cumsum(counts[:-1])))
+        owner = np.repeat(np.arange(len(firsts)), counts)
+        inner = np.arange(owner.size) - starts[owner] + firsts[owner] + 1
+
+        origin = points[firsts]
+        chord = points[lasts] - origin
+        span = np.hypot(chord[:, 0], chord[:, 1])
+        offset = points[inner] - origin[owner]
+        cross = np.abs(chord[owner, 0] * offset[:, 1] - chord[owner, 1] * offset[:, 0])
+        distance = cross / np.where(span == 0, 1, span)[owner]
+        if not span.all():
+            degenerate = span[owner] == 0
+            distance[degenerate] = np.hypot(*offset[degenerate].T)
+
+        farthest = np.maximum.reduceat(distance, starts)
+        candidates = np.flatnonzero(distance == farthest[owner])
+        _, first_hit = np.unique(owner[candidates], return_index=True)
+        splits = inner[candidates[first_hit]]
+
+        split = farthest > tolerance
+        splits = splits[split]
+        keep[splits] = True
+        firsts, lasts = (
+            np.concatenate((firsts[split], splits)),
+            np.concatenate((splits, lasts[split])),
+        )
+
+    return Pixels(points[keep, 0], points[keep, 1], dtype=np.float32)